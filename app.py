@@ -1,37 +1,166 @@
-import cv2
-import mediapipe as mp
-import pygame
-import os
 import time
+INICIO_PROCESSO = time.perf_counter() # Referência para os tempos de inicialização
+
+import os
+import argparse
 import threading
-import customtkinter as ctk
 
-# Importando módulos locais
-from interface import SoundpadInterface
-from helpers import count_fingers, draw_modern_overlay, load_json_config, save_json_config
+# Importando módulos locais (só os leves: cv2, mediapipe e pygame ficam para depois da janela;
+# a interface só no __main__, o processo de inferência reimporta este arquivo)
+from configuracao import load_json_config, GravadorConfig
+from gestos import MaquinaGestos, TabelaGestos, PADRAO_GESTOS, chave_gesto
+from vigia import VigiaArquivos, DESCONHECIDO
 
 ARQUIVO_CONFIG = "config.json"
+INTERVALO_RELATORIO = 5.0 # Segundos entre os relatórios de FPS no console
 
-# --- 1. CONFIGURAÇÃO DE ÁUDIO (Anti-Delay) ---
-try:
-    # Frequência 48000Hz para casar com VoiceMeeter e evitar som "robô"
-    pygame.mixer.pre_init(frequency=48000, size=-16, channels=2, buffer=4096)
-    pygame.mixer.init()
-except Exception as e:
-    print(f"Erro starting audio system: {e}")
-
-# --- 2. VARIÁVEIS GLOBAIS ---
+# --- 1. VARIÁVEIS GLOBAIS ---
 rodando_ia = False
 sons_carregados = {} 
+maquina_gestos = MaquinaGestos() # Timer de segurar o gesto (configurado pelo perfil ativo)
+regras_gestos = {} # gesto -> (política, grupo de corte) do perfil ativo
+tabela_gestos = TabelaGestos() # Índice das mãos no frame -> gesto (contagem ou pose do perfil ativo)
+gesto_parar = None # Gesto que para todos os sons (opcional, "stop_gesture" no perfil)
+arquivo_gravacao = None # Definido por --record: grava os landmarks de cada sessão da câmera
+arquivo_metricas = None # Definido por --metrics-file (ou "metrics_file" no config.json)
+fonte_cli = {} # --source / --pacing / --loops: sobrescrevem a câmera do config.json
+
+# Carregados no __main__: importar este arquivo (o spawn do processo de inferência
+# faz isso) não lê nem grava o config.json
+dados_config = {}
+gravador_config = None # GravadorConfig: salva em segundo plano, agrupando alterações
+
+# Preenchidos por carregar_backend() (em segundo plano, depois que a janela abre)
+backend_pronto = threading.Event()
+erro_backend = None # Exceção que impediu o backend de subir (backend_pronto é liberado mesmo assim)
+cv2 = None
+mp = None
+motor_audio = None
+cache_disco = None
+cache_sons = None
+bancos_sons = None
+vigia_sons = None # Confere os arquivos de som de todos os perfis e recarrega só o que mudou
+modelo_maos = None # MediaPipe Hands, criado uma vez e reaproveitado a cada START CAMERA
+modelos_extras = [] # Um modelo por câmera adicional (criados na primeira vez que são usados)
+processo_inferencia = None # "inference_mode": "process": captura + IA noutro processo, reaproveitado
+PARAMETROS_MODELO = {"model_complexity": 0, "max_num_hands": 2, "min_detection_confidence": 0.7}
+lock_camera = threading.Lock() # Só um loop da câmera usa o modelo por vez
+ao_mudar_estado_slot = None # Avisos de carregamento por slot (a interface define)
+
+# --- 2. INICIALIZAÇÃO DO BACKEND (Imports pesados + Áudio + Modelo) ---
+
+def carregar_backend():
+    """
+    Importa cv2/mediapipe/pygame, liga o áudio, aquece o modelo de mãos e
+    carrega os sons. Roda numa thread para a interface aparecer antes.
+    Se algo falhar, registra o erro e libera quem espera por backend_pronto.
+    """
+    global erro_backend
+    try:
+        _carregar_backend()
+    except Exception as e:
+        erro_backend = e
+        print(f"[ERRO] Backend failed to start: {e!r}")
+        backend_pronto.set()
+
+def _carregar_backend():
+    global cv2, mp, motor_audio, cache_disco, cache_sons, bancos_sons, modelo_maos, processo_inferencia, vigia_sons
+    tempos = {}
+    em_processo = dados_config.get("inference_mode", "thread") == "process"
+
+    # O processo de inferência sobe primeiro: importa o MediaPipe em paralelo com o resto
+    if em_processo:
+        from processo_inferencia import InferenciaProcesso
+        t_processo = time.perf_counter()
+        processo_inferencia = InferenciaProcesso(PARAMETROS_MODELO)
+
+    t0 = time.perf_counter()
+    import cv2
+    tempos["cv2"] = time.perf_counter() - t0
+
+    # No modo processo o MediaPipe só existe no processo de inferência
+    if not em_processo:
+        t0 = time.perf_counter()
+        import mediapipe as mp
+        tempos["mediapipe"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    from audio import CacheSons, CachePCMDisco, BancosSons, MotorAudio
+    tempos["pygame"] = time.perf_counter() - t0
+
+    # --- CONFIGURAÇÃO DE ÁUDIO (Anti-Delay) ---
+    # Buffer, vozes e roubo vêm do config.json: "audio": {"latency": "low", "voices": 8, "voice_stealing": "oldest"}
+    config_audio = dados_config.get("audio", {})
+    motor_audio = MotorAudio(config_audio.get("latency", "normal"), config_audio.get("voices", 8),
+                             config_audio.get("voice_stealing", "oldest"))
+    try:
+        motor_audio.iniciar()
+    except Exception as e:
+        print(f"Erro starting audio system: {e}")
+
+    # Sons decodificados (LRU limitado por memória), reaproveitados entre recargas e perfis
+    # O PCM decodificado também fica em disco para a próxima abertura ("disk_cache_mb": 0 desliga)
+    limite_disco = config_audio.get("disk_cache_mb", 2048)
+    cache_disco = CachePCMDisco(limite_mb=limite_disco) if limite_disco else None
+    # "cache_mb" é o orçamento total de áudio decodificado na RAM; sons acima de
+    # "stream_threshold_mb" tocam em streaming do cache em disco
+    # "normalize" iguala o volume dos sons (RMS em "target_db"); "peak_ceiling_db": null desliga o limitador
+    cache_sons = CacheSons(config_audio.get("cache_mb", 512), cache_disco,
+                           config_audio.get("stream_threshold_mb", 16),
+                           config_audio.get("normalize", False), config_audio.get("target_db", -20.0),
+                           config_audio.get("peak_ceiling_db", -1.0))
+    bancos_sons = BancosSons(cache_sons)
+    bancos_sons.ao_mudar_estado = ao_mudar_estado_slot
+
+    # Arquivo de som editado, apagado ou restaurado: recarrega só ele ("watch_interval": 0 desliga)
+    intervalo_vigia = config_audio.get("watch_interval", 1.0)
+    if intervalo_vigia:
+        vigia_sons = VigiaArquivos(ao_mudar_arquivo_som, intervalo_vigia)
+
+    # Configuração do MediaPipe para 2 mãos (uma vez só; aquecido com um frame vazio)
+    if em_processo:
+        processo_inferencia.esperar_pronto()
+        tempos["inference process"] = time.perf_counter() - t_processo
+    else:
+        t0 = time.perf_counter()
+        modelo_maos = criar_modelo_maos()
+        tempos["hand model"] = time.perf_counter() - t0
+
+    backend_pronto.set()
+    resumo = ", ".join(f"{nome} {segundos:.2f} s" for nome, segundos in tempos.items())
+    print(f"[STARTUP] Backend ready {time.perf_counter() - INICIO_PROCESSO:.2f} s after launch ({resumo})")
+
+    reload_sounds()
+
+def criar_modelo_maos():
+    import numpy as np
+    modelo = mp.solutions.hands.Hands(**PARAMETROS_MODELO)
+    modelo.process(np.zeros((240, 320, 3), dtype=np.uint8))
+    return modelo
 
-# Carrega a configuração inicial usando o helper
-dados_config = load_json_config(ARQUIVO_CONFIG)
+def modelo_da_camera(indice):
+    """
+    Modelo de mãos da câmera `indice`. O rastreamento do MediaPipe segue a sequência
+    de frames, então cada câmera tem o seu; todos rodam na mesma thread de inferência.
+    """
+    if indice == 0:
+        return modelo_maos
+    while len(modelos_extras) < indice:
+        modelos_extras.append(criar_modelo_maos())
+    return modelos_extras[indice - 1]
 
 # --- 3. GERENCIAMENTO DE SONS ---
 
-def reload_sounds():
-    """Lê a configuração do PERFIL ATIVO e carrega os sons."""
-    global sons_carregados
+def reload_sounds(esperar=False):
+    """
+    Lê a configuração do PERFIL ATIVO e carrega os sons em segundo plano.
+    sons_carregados só é trocado quando o banco novo está pronto.
+    esperar=True bloqueia até a troca (usado ao ligar a câmera).
+    """
+    # Antes do backend ficar pronto não há o que recarregar: ele chama reload_sounds ao terminar
+    global regras_gestos, gesto_parar, tabela_gestos
+    if not backend_pronto.is_set() or erro_backend:
+        return
     print("--- Reloading sounds ---")
     
     vol = dados_config.get("volume", 1.0)
@@ -50,168 +179,459 @@ def reload_sounds():
 
     # 2. Pega os dados SOMENTE desse perfil
     dados_perfil = perfis[nome_perfil]
-    gestos = dados_perfil.get("gestures", {})
-    aliases = dados_perfil.get("aliases", {})
-    
-    novos_sons = {}
-    
-    for gesto_str, caminho in gestos.items():
-        if caminho and os.path.exists(caminho):
-            try:
-                qtd = int(gesto_str)
-                som = pygame.mixer.Sound(caminho)
-                som.set_volume(vol)
-                
-                # LÓGICA NOVA: Prioriza o Alias, senão usa nome do arquivo
-                if gesto_str in aliases:
-                    nome_exibicao = aliases[gesto_str]
-                else:
-                    nome_exibicao = os.path.splitext(os.path.basename(caminho))[0]
-                
-                novos_sons[qtd] = {"obj": som, "txt": nome_exibicao}
-                print(f"[OK] Gesture {qtd}: {nome_exibicao}")
-            except Exception as e:
-                print(f"[ERRO] Error loading {caminho}: {e}")
-    
-    sons_carregados = novos_sons
+
+    # Tempo de segurar, cooldown etc. podem ser definidos por perfil
+    maquina_gestos.configurar(**{chave: dados_perfil.get(chave, dados_config.get(chave, padrao))
+                                 for chave, padrao in PADRAO_GESTOS.items()})
+
+    # Como cada gesto redispara: "policies": {"1": "restart"}, "choke_groups": {"3": "hats", "4": "hats"}
+    regras_gestos = montar_regras(dados_perfil)
+    parar = dados_perfil.get("stop_gesture", dados_config.get("stop_gesture"))
+    gesto_parar = ler_chave(parar, "stop_gesture") if parar else None
+
+    # Poses ("L01100", "L01000+R01000"...) entram numa tabela pré-calculada: o frame vira um índice
+    # (chaves inválidas são avisadas pelo montar_banco)
+    chaves = {gesto_parar}
+    for chave in dados_perfil.get("gestures", {}):
+        try:
+            chaves.add(chave_gesto(chave))
+        except ValueError:
+            pass
+    tabela_gestos = TabelaGestos(chaves - {None})
+
+    if vigia_sons:
+        vigia_sons.observar(caminho for dados in perfis.values()
+                            for caminho in dados.get("gestures", {}).values() if caminho)
+
+    # Cópias: a interface pode alterar o config enquanto o carregamento roda
+    tarefa = bancos_sons.ativar(nome_perfil, copiar_perfil(dados_perfil), vol, trocar_banco)
+
+    # Pré-carrega os outros perfis para a troca ser instantânea
+    bancos_sons.preaquecer({nome: copiar_perfil(dados) for nome, dados in perfis.items() if nome != nome_perfil})
+
+    if esperar:
+        tarefa.result()
+
+def ler_chave(texto, origem):
+    """chave_gesto() que só avisa no console (e retorna None) se a chave for inválida."""
+    try:
+        return chave_gesto(texto)
+    except ValueError as e:
+        print(f"[ERRO] Ignoring {origem}: {e}")
+        return None
+
+def montar_regras(dados_perfil):
+    """Tabela gesto -> (política, grupo), montada na recarga para o disparo só fazer um lookup."""
+    from audio import POLITICAS, POLITICA_SOBREPOR
+    padrao = dados_perfil.get("default_policy", dados_config.get("default_policy", POLITICA_SOBREPOR))
+    politicas = dados_perfil.get("policies", {})
+    grupos = dados_perfil.get("choke_groups", {})
+    regras = {}
+    for chave in set(politicas) | set(grupos):
+        politica = politicas.get(chave, padrao)
+        if politica not in POLITICAS:
+            print(f"[AUDIO] Unknown policy '{politica}' for gesture {chave}, using {padrao}")
+            politica = padrao
+        gesto = ler_chave(chave, "policy")
+        if gesto is not None:
+            regras[gesto] = (politica, grupos.get(chave))
+    regras[None] = (padrao, None) # Gestos sem regra própria
+    return regras
+
+def copiar_perfil(dados_perfil):
+    return {"gestures": dict(dados_perfil.get("gestures", {})),
+            "aliases": dict(dados_perfil.get("aliases", {}))}
+
+def trocar_banco(novo_banco):
+    """Troca o banco ativo de uma vez (a câmera nunca vê um banco pela metade)."""
+    global sons_carregados
+    sons_carregados = novo_banco
+
+def ao_mudar_arquivo_som(caminho, antes, depois):
+    """
+    Chamado pela thread do vigia. Só os slots do perfil ativo que usam o arquivo
+    são recarregados (na fila dos bancos, sem travar a câmera); os outros
+    perfis pegam a versão nova quando forem ativados.
+    """
+    if antes is DESCONHECIDO:
+        return # Primeira conferência: o carregamento do perfil já cuidou dele
+    if depois is None:
+        print(f"[AUDIO] Sound file missing: {caminho}")
+    elif antes is None:
+        print(f"[AUDIO] Sound file restored: {caminho}")
+    else:
+        print(f"[AUDIO] Sound file changed, reloading: {caminho}")
+    dados_perfil = dados_config.get("profiles", {}).get(dados_config.get("current_profile", "Padrão"))
+    if dados_perfil:
+        bancos_sons.recarregar_arquivo(caminho, copiar_perfil(dados_perfil), dados_config.get("volume", 1.0),
+                                       aplicar_recarga)
+
+def aplicar_recarga(itens, removidos):
+    """Troca só os slots recarregados, numa cópia do banco (mesma troca atômica do trocar_banco)."""
+    global sons_carregados
+    novo_banco = dict(sons_carregados)
+    for gesto in removidos:
+        novo_banco.pop(gesto, None)
+    novo_banco.update(itens)
+    sons_carregados = novo_banco
 
 # --- 4. CALLBACKS (Pontes entre Interface e Lógica) ---
 
 def update_config_callback():
     """Chamado pela interface quando o usuário muda volume ou arquivos."""
-    save_json_config(ARQUIVO_CONFIG, dados_config)
+    gravador_config.agendar(dados_config)
     reload_sounds()
 
+def update_volume_callback():
+    """Chamado a cada movimento do slider: só ajusta o volume, sem recarregar nada."""
+    gravador_config.agendar(dados_config)
+    vol = dados_config.get("volume", 1.0)
+    for item in sons_carregados.values():
+        item["obj"].set_volume(vol * item.get("ganho", 1.0))
+
 def toggle_camera_callback():
     """Liga ou Desliga a thread da visão computacional."""
     global rodando_ia
     if not rodando_ia:
         rodando_ia = True
         # Inicia a thread como 'daemon' (morre junto com o app)
-        threading.Thread(target=main_camera_loop, daemon=True).start()
+        threading.Thread(target=main_camera_loop, kwargs={"arquivo_gravacao": arquivo_gravacao},
+                         daemon=True).start()
     else:
         rodando_ia = False
 
 # --- 5. LOOP DA VISÃO COMPUTACIONAL (O Coração da IA) ---
 
-def main_camera_loop():
+def main_camera_loop(headless=False, arquivo_preview=None, intervalo_preview=1.0, arquivo_gravacao=None):
+    """
+    headless: sem janela e sem desenho (só detecção, som e log dos disparos).
+    arquivo_preview: se definido, salva um JPEG do frame (com HUD) a cada intervalo_preview segundos.
+    arquivo_gravacao: se definido, grava os landmarks de cada frame num .npz (ver replay.py).
+    """
+    t_inicio = time.perf_counter()
+
+    # Espera o backend (imports + modelo) se a câmera foi ligada logo ao abrir o app
     global rodando_ia
+    backend_pronto.wait()
+    if erro_backend:
+        print(f"[ERRO] Camera not started: backend unavailable ({erro_backend!r})")
+        rodando_ia = False
+        return
+    with lock_camera:
+        _loop_camera(t_inicio, headless, arquivo_preview, intervalo_preview, arquivo_gravacao)
+
+def _loop_camera(t_inicio, headless, arquivo_preview, intervalo_preview, arquivo_gravacao):
+    global rodando_ia
+    from helpers import indice_gesto, confianca_maos, maos_do_frame, desenhar_maos, draw_modern_overlay, salvar_jpeg_atomico
+    from pipeline import PipelineCamera, FonteCamera, AgendadorInferencia
+    from replay import GravadorLandmarks
+    from metricas import Metricas
+    from camera import abrir_camera, configs_cameras
+    from gestos import FusaoVistas
+
+    # Resolução, FPS, formato e buffer vêm de "camera" no config.json (global ou por perfil);
+    # "cameras" (lista) liga várias câmeras, todas na mesma thread de inferência
+    # Agendador adaptativo: IA rara e reduzida sem mãos, todo frame (com o rastreamento do MediaPipe) quando ativa
+    adaptativo = dados_config.get("adaptive_inference", True)
+    configs = configs_cameras(dados_config, fonte_cli)
+    fontes = []
+    if not processo_inferencia:
+        for indice, config in enumerate(configs):
+            # Modelo já aquecido; reset() só limpa o rastreamento da sessão anterior
+            hands = modelo_da_camera(indice)
+            if hasattr(hands, "reset"):
+                hands.reset()
+            fontes.append(FonteCamera(config["name"], abrir_camera(config), hands,
+                                      AgendadorInferencia() if adaptativo else None))
+    fusao = FusaoVistas()
+    primeiro_frame = True
     
-    # Configuração do MediaPipe para 2 mãos
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(model_complexity=0, max_num_hands=2, min_detection_confidence=0.7)
-    mp_draw = mp.solutions.drawing_utils
-    
-    cap = cv2.VideoCapture(0)
-    
-    # Variáveis de controle de tempo
-    gesto_analisado = -1
-    inicio_contagem = 0
-    ja_tocou = False
+    # Estado do gesto começa do zero a cada vez que a câmera liga
+    maquina_gestos.reiniciar()
+    gravador = GravadorLandmarks() if arquivo_gravacao else None
     
     # Textos para o Overlay
     status_topo = "Waiting for gesture..."
     msg_principal = "Starting..."
     
     # Garante que os sons estão atualizados ao abrir a câmera
-    reload_sounds()
+    reload_sounds(esperar=True)
+
+    # Captura e inferência rodam em threads próprias; este loop é o estágio de render
+    # Tempos por estágio (p50/p95/p99); "metrics_file" no config exporta em JSON-lines
+    metricas = Metricas(arquivo=arquivo_metricas or dados_config.get("metrics_file"))
+    if metricas.arquivo:
+        print(f"[METRICS] Exporting stage timings to {metricas.arquivo}")
+    mostrar_metricas = False # Alternado com a tecla 'p'
+    if processo_inferencia:
+        # Captura e IA no processo de inferência; aqui só chegam o frame e os landmarks
+        pipeline = processo_inferencia
+        try:
+            pipeline.iniciar(configs, adaptativo, metricas)
+        except RuntimeError as e:
+            print(f"[ERRO] Camera not started: {e}")
+            rodando_ia = False
+            return
+    else:
+        pipeline = PipelineCamera(fontes, metricas)
+        pipeline.iniciar()
+    inicio_sessao = time.time()
+    frames_processados = 0
+    ultimo_relatorio = time.time()
+    ultimo_preview = 0.0
+    progresso = 0.0
+    t_gestos = float("-inf") # Relógio da máquina de gestos (monotônico entre as vistas)
 
-    while rodando_ia and cap.isOpened():
-        success, img = cap.read()
-        if not success: break
+    while rodando_ia and not pipeline.terminou():
+        frame = pipeline.proximo_resultado(timeout=0.1)
+        if frame is None:
+            continue
 
-        # Espelha e converte cores
-        img = cv2.flip(img, 1)
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = hands.process(img_rgb)
+        img = frame["img"]
+        codigos = frame["codigos"] # Dedos de cada mão em bits; vazio quando o agendador pulou a IA
+        t_frame = frame["t_captura"]
+        frames_processados += 1
+
+        if primeiro_frame:
+            print(f"[STARTUP] First frame {time.perf_counter() - t_inicio:.2f} s after camera start")
+            primeiro_frame = False
         
-        gesto_agora = 0
+        indice = 0
+        t_estagio = time.perf_counter()
         
-        # Desenha esqueleto e conta dedos (Soma das duas mãos)
-        if results.multi_hand_landmarks:
-            ignorar_segunda_mao = False
-
-            # Se detectar 2 mãos, verifica se elas não são a mesma (sobrepostas)
-            if len(results.multi_hand_landmarks) == 2:
-                pulso1 = results.multi_hand_landmarks[0].landmark[0]
-                pulso2 = results.multi_hand_landmarks[1].landmark[0]
-                
-                # Calcula a distância entre os pulsos (horizontal e vertical)
-                dist_x = abs(pulso1.x - pulso2.x)
-                dist_y = abs(pulso1.y - pulso2.y)
-                
-                # Se a distância for menor que 10% da tela, considera duplicata
-                if dist_x < 0.1 and dist_y < 0.1:
-                    ignorar_segunda_mao = True
-
-            # Loop para desenhar e contar
-            for i, hand_lms in enumerate(results.multi_hand_landmarks):
-                # Se marcamos para ignorar e este é o segundo item (índice 1), pula
-                if i == 1 and ignorar_segunda_mao:
-                    continue
-                
-                mp_draw.draw_landmarks(img, hand_lms, mp_hands.HAND_CONNECTIONS)
-                gesto_agora += count_fingers(hand_lms)
+        # Dedos de cada mão (com o lado) viram um índice de 12 bits
+        validas = []
+        if codigos:
+            # Se detectar 2 mãos sobrepostas (mesma mão), ignora a segunda
+            indice, validas = indice_gesto(codigos, frame["pulsos"], frame["lados"], frame["scores"])
+        # Soma dos dedos ou a pose do perfil: um acesso à tabela montada na recarga
+        tabela = tabela_gestos
+        gesto_agora = tabela[indice]
+
+        # Várias câmeras: vale a vista mais confiável; o preview mostra só ela
+        if len(configs) > 1:
+            gesto_agora = fusao.atualizar(frame["fonte"], gesto_agora, confianca_maos(frame["scores"], validas), t_frame)
+        vista_principal = len(configs) == 1 or frame["fonte"] == fusao.vencedora
+        if gravador is not None and vista_principal:
+            gravador.adicionar(t_frame, maos_do_frame(frame), frame["lados"], frame["scores"])
+
+        if codigos:
+            if not headless and vista_principal:
+                t_desenho = time.perf_counter()
+                # O array com os 21 landmarks só é montado aqui (e na gravação)
+                desenhar_maos(img, maos_do_frame(frame), validas)
+                # O desenho do esqueleto conta como "draw", não como lógica de gesto
+                t_estagio += time.perf_counter() - t_desenho
+                metricas.registrar("draw", time.perf_counter() - t_desenho)
         
-        # --- Lógica de Timer (1 Segundo) ---
-        if gesto_agora != gesto_analisado:
-            gesto_analisado = gesto_agora
-            inicio_contagem = time.time()
-            ja_tocou = False
-            status_topo = "Detecting..."
+        # Relatório periódico de FPS por estágio
+        agora = time.time()
+        if agora - ultimo_relatorio >= INTERVALO_RELATORIO:
+            print(f"[PIPELINE] {pipeline.resumo(agora - frame['t_leitura'])}")
+            ultimo_relatorio = agora
+        metricas.exportar_se_preciso({"cameras": pipeline.estatisticas(),
+                                      "resolution": [img.shape[1], img.shape[0]]}, agora)
+
+        # Só a vista vencedora alimenta a máquina de gestos: votos de câmeras
+        # diferentes não se misturam e o tempo dela nunca volta atrás
+        if not vista_principal:
+            continue
+        t_gestos = max(t_frame, t_gestos)
+
+        # --- Lógica de Timer (votação + tolerância a falhas + cooldown) ---
+        # Slots ainda carregando não disparam (nem com o som do banco anterior)
+        carregando = bancos_sons.carregando
+        disponiveis = sons_carregados.keys() - carregando if carregando else sons_carregados
+        if gesto_parar:
+            disponiveis = {gesto_parar, *disponiveis}
+        disparou = maquina_gestos.atualizar(gesto_agora, t_gestos, disponiveis)
+        gesto = maquina_gestos.gesto
+        progresso = maquina_gestos.progresso
+
+        # Verifica se existe som para esse gesto
+        if gesto_parar and gesto == gesto_parar:
+            if disparou:
+                motor_audio.parar_tudo(fade_ms=30)
+                print(f"[TRIGGER] Gesture {gesto}: stop all")
+                msg_principal = "Stopped all sounds"
+                status_topo = "Success!"
+            elif not maquina_gestos.ja_tocou:
+                msg_principal = "Stop all sounds"
+                status_topo = "Detecting..." if maquina_gestos.mudou else f"Hold... {int(progresso*100)}%"
+        elif gesto in carregando:
+            msg_principal = "Loading sound..."
+            status_topo = f"Fingers: {gesto}"
             progresso = 0.0
-        else:
-            tempo_decorrido = time.time() - inicio_contagem
-            progresso = min(tempo_decorrido / 1.0, 1.0) # 1.0 segundo para ativar
-            
-            # Verifica se existe som para esse gesto
-            if gesto_agora in sons_carregados:
-                nome_som = sons_carregados[gesto_agora]['txt']
-                
-                if not ja_tocou:
-                    msg_principal = f"Loading: {nome_som}"
-                    status_topo = f"Hold... {int(progresso*100)}%"
-                    
-                    if tempo_decorrido >= 1.0:
-                        try:
-                            sons_carregados[gesto_agora]["obj"].play()
-                            ja_tocou = True
-                            msg_principal = f"Sound: {nome_som}"
-                            status_topo = "Success!"
-                        except:
-                            msg_principal = "Error playing sound"
-                else:
-                    # Mantém a mensagem de sucesso enquanto segura o gesto
+        elif gesto in sons_carregados:
+            nome_som = sons_carregados[gesto]['txt']
+
+            if disparou:
+                try:
+                    politica, grupo = regras_gestos.get(gesto) or regras_gestos.get(None, ("overlap", None))
+                    canal = motor_audio.tocar(sons_carregados[gesto]["obj"], gesto, politica, grupo)
+                    # Latência vidro->disparo: idade do frame que completou o gesto
+                    # (t_leitura é relógio de parede; em arquivos t_captura é o relógio da mídia)
+                    latencia = time.time() - frame["t_leitura"]
+                    if canal is None:
+                        print(f"[TRIGGER] Gesture {gesto}: {nome_som} still playing, ignored")
+                    else:
+                        print(f"[TRIGGER] Gesture {gesto}: {nome_som} "
+                              f"(glass-to-trigger {latencia * 1000:.0f} ms, "
+                              f"audio ~{motor_audio.latencia_estimada_ms():.0f} ms)")
                     msg_principal = f"Sound: {nome_som}"
-                    status_topo = "Release to restart"
+                    status_topo = "Success!" if canal else "Still playing"
+                except:
+                    msg_principal = "Error playing sound"
+            elif maquina_gestos.ja_tocou:
+                # Mantém a mensagem de sucesso enquanto segura o gesto
+                msg_principal = f"Sound: {nome_som}"
+                status_topo = "Release to restart"
             else:
-                msg_principal = "No defined sound"
-                status_topo = f"Fingers: {gesto_agora}"
-                progresso = 0.0
+                msg_principal = f"Loading: {nome_som}"
+                status_topo = "Detecting..." if maquina_gestos.mudou else f"Hold... {int(progresso*100)}%"
+        else:
+            msg_principal = "No defined sound"
+            status_topo = f"Fingers: {gesto}"
+            progresso = 0.0
+        metricas.registrar("gesture", time.perf_counter() - t_estagio)
+
+        # Sem janela: no máximo um JPEG de preview de vez em quando
+        if headless:
+            if arquivo_preview and agora - ultimo_preview >= intervalo_preview:
+                draw_modern_overlay(img, progresso, msg_principal, status_topo)
+                salvar_jpeg_atomico(arquivo_preview, img)
+                ultimo_preview = agora
+            continue
 
         # --- Desenha o HUD Moderno ---
         # Usa a função nova do helpers.py com transparência
+        t_estagio = time.perf_counter()
         draw_modern_overlay(img, progresso, msg_principal, status_topo)
         
         # Adiciona contador visual extra no canto
         h, w, _ = img.shape
-        cv2.putText(img, str(gesto_agora), (w - 60, h - 35), 
+        cv2.putText(img, str(tabela.contagens[indice]), (w - 60, h - 35), 
                     cv2.FONT_HERSHEY_DUPLEX, 1, (255, 255, 255), 2)
 
+        if mostrar_metricas:
+            metricas.desenhar(img)
+        t_display = time.perf_counter()
+        metricas.registrar("draw", t_display - t_estagio)
+
         cv2.imshow("Visual Soundpad AI", img)
+        tecla = cv2.waitKey(1)
+        metricas.registrar("display", time.perf_counter() - t_display)
         
         # Tecla de emergência 'q' para fechar apenas a câmera
-        if cv2.waitKey(1) == ord('q'):
+        if tecla == ord('q'):
             rodando_ia = False
             break
+        # 'p' liga/desliga o HUD de desempenho
+        if tecla == ord('p'):
+            mostrar_metricas = not mostrar_metricas
             
-    cap.release()
-    cv2.destroyAllWindows()
-    hands.close()
+    pipeline.parar()
+    # Vazão ponta a ponta (útil com fontes de arquivo no ritmo "fast")
+    duracao = time.time() - inicio_sessao
+    print(f"[PIPELINE] Session: {frames_processados} frames in {duracao:.1f} s "
+          f"({frames_processados / duracao if duracao > 0 else 0:.1f} fps end-to-end)")
+    if gravador is not None:
+        gravador.salvar(arquivo_gravacao)
+    for fonte in fontes:
+        fonte.cap.release()
+    if not headless:
+        cv2.destroyAllWindows()
+    # O modelo não é fechado: fica pronto para o próximo START CAMERA
+
+# --- 6. MODO HEADLESS (Sem interface) ---
+
+def run_headless(arquivo_preview=None, intervalo_preview=1.0, arquivo_gravacao=None):
+    """Roda detecção e som sem a janela do Tk nem o preview da câmera (Ctrl+C para sair)."""
+    global rodando_ia
+    rodando_ia = True
+    print("[HEADLESS] Detection running without GUI. Press Ctrl+C to stop.")
+
+    loop = threading.Thread(target=main_camera_loop, args=(True, arquivo_preview, intervalo_preview, arquivo_gravacao),
+                            daemon=True)
+    loop.start()
+    try:
+        while loop.is_alive():
+            loop.join(timeout=0.5)
+    except KeyboardInterrupt:
+        print("[HEADLESS] Stopping...")
+        rodando_ia = False
+        loop.join(timeout=2.0)
+    if processo_inferencia:
+        processo_inferencia.fechar()
+    gravador_config.fechar()
 
-# --- 6. INICIALIZAÇÃO DO APP ---
+# --- 7. INICIALIZAÇÃO DO APP ---
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visual Soundpad AI")
+    parser.add_argument("--headless", action="store_true",
+                        help="roda só a detecção e o som, sem interface nem janela da câmera")
+    parser.add_argument("--preview-file", metavar="ARQUIVO.jpg",
+                        help="(headless) salva um JPEG do preview neste arquivo")
+    parser.add_argument("--preview-interval", type=float, default=1.0, metavar="SEGUNDOS",
+                        help="(headless) intervalo entre os JPEGs de preview (padrão: 1.0)")
+    parser.add_argument("--record", metavar="ARQUIVO.npz",
+                        help="grava os landmarks de cada frame para reproduzir com replay.py")
+    parser.add_argument("--prune-cache", action="store_true",
+                        help="apaga do cache de PCM os sons que mudaram ou sumiram e sai")
+    parser.add_argument("--metrics-file", metavar="ARQUIVO.jsonl",
+                        help="acrescenta os tempos p50/p95/p99 de cada estágio neste arquivo a cada 5 s")
+    parser.add_argument("--probe-camera", action="store_true",
+                        help="mede os modos da webcam, salva o de menor latência em \"camera\" no config.json e sai")
+    parser.add_argument("--source", metavar="VIDEO|PASTA",
+                        help="lê frames de um vídeo ou pasta de imagens em vez da webcam")
+    parser.add_argument("--pacing", choices=["realtime", "fast"],
+                        help="(--source) no FPS do vídeo ou o mais rápido possível, sem descartar frames")
+    parser.add_argument("--loops", type=int, help="(--source) quantas vezes repetir o arquivo")
+    args = parser.parse_args()
+    dados_config = load_json_config(ARQUIVO_CONFIG)
+    gravador_config = GravadorConfig(ARQUIVO_CONFIG)
+    arquivo_gravacao = args.record
+    fonte_cli = {chave: valor for chave, valor in
+                 (("source", args.source), ("pacing", args.pacing), ("loops", args.loops)) if valor is not None}
+    arquivo_metricas = args.metrics_file
+
+    if args.prune_cache:
+        from audio import CachePCMDisco
+        limite_disco = dados_config.get("audio", {}).get("disk_cache_mb", 2048)
+        if limite_disco:
+            apagadas, liberados = CachePCMDisco(limite_mb=limite_disco).limpar_obsoletos()
+            print(f"[CACHE] Removed {apagadas} stale entries, freed {liberados / 1024 / 1024:.1f} MB")
+        os._exit(0)
+
+    if args.probe_camera:
+        from camera import sondar_camera, config_captura
+        try:
+            import mediapipe as mp
+            hands = mp.solutions.hands.Hands(**PARAMETROS_MODELO) # O mesmo modelo que o pipeline usa
+        except ImportError:
+            hands = None
+        print("[CAMERA] Probing capture modes (show a hand to the camera to compare detection)...")
+        melhor, _ = sondar_camera(config_captura(dados_config), hands)
+        if melhor is None:
+            print("[ERRO] No usable camera mode found.")
+        else:
+            print(f"[CAMERA] Best mode: {melhor['mode']} ({melhor['config']['backend']}), "
+                  f"~{melhor['latency_ms']:.0f} ms")
+            dados_config["camera"] = {chave: melhor["config"][chave]
+                                      for chave in ("device", "backend", "width", "height", "fps", "fourcc", "buffer_size")}
+            gravador_config.agendar(dados_config)
+            gravador_config.fechar()
+        os._exit(0)
+
+    if args.headless:
+        carregar_backend()
+        run_headless(args.preview_file, args.preview_interval, args.record)
+        os._exit(0)
+
+    import customtkinter as ctk
+    from interface import SoundpadInterface
+
     # Importante: CustomTkinter exige ctk.CTk() em vez de tk.Tk()
     root = ctk.CTk()
     
@@ -220,13 +640,25 @@ if __name__ == "__main__":
         root, 
         dados_config, 
         toggle_camera_callback, 
-        update_config_callback
+        update_config_callback,
+        update_volume_callback
     )
+    # Estado de carregamento de cada slot (chega das threads de decodificação)
+    ao_mudar_estado_slot = app.notificar_estado_slot
+    print(f"[STARTUP] GUI ready {time.perf_counter() - INICIO_PROCESSO:.2f} s after launch")
+
+    # Imports pesados, áudio e modelo de mãos carregam com a janela já aberta
+    threading.Thread(target=carregar_backend, daemon=True).start()
     
     # Garante que tudo feche ao clicar no X
     def on_closing():
         global rodando_ia
         rodando_ia = False
+        if processo_inferencia:
+            # Espera o loop da câmera soltar o pipe antes de encerrar o processo
+            lock_camera.acquire(timeout=2.0)
+            processo_inferencia.fechar()
+        gravador_config.fechar() # Não perde a última alteração pendente
         root.destroy()
         os._exit(0) # Força o encerramento de todas as threads
         
@@ -0,0 +1,903 @@
+import os
+import json
+import mmap
+import time
+import hashlib
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pygame
+
+from gestos import chave_gesto
+from vigia import assinatura
+
+# --- CONFIGURAÇÃO DO MOTOR ---
+
+# Frequência 48000Hz para casar com VoiceMeeter e evitar som "robô"
+FREQUENCIA = 48000
+
+# Perfis de latência: tamanho do buffer de saída em frames
+# (4096 era o valor antigo: ~85 ms só de buffer a 48 kHz)
+PERFIS_LATENCIA = {
+    "ultra": 256,
+    "low": 512,
+    "normal": 1024,
+    "safe": 4096,
+}
+
+# Memória máxima para sons decodificados (todos os perfis somados)
+LIMITE_CACHE_MB = 512
+
+# Cache em disco do PCM já decodificado (evita decodificar MP3 a cada abertura do app)
+PASTA_CACHE_PCM = ".cache_pcm"
+LIMITE_CACHE_DISCO_MB = 2048
+
+# Sons maiores que isso (PCM decodificado) tocam em streaming do cache em disco
+# em vez de ficar inteiros na RAM (16 MB ~ 87 s estéreo a 48 kHz)
+LIMITE_STREAM_MB = 16
+DURACAO_BLOCO_STREAM = 0.5 # Segundos de áudio em cada bloco do streaming
+
+# Normalização de volume por som ("audio": {"normalize": true, ...} no config.json)
+ALVO_RMS_DB = -20.0     # Volume médio (RMS, dBFS) que todos os sons passam a ter
+TETO_PICO_DB = -1.0     # Limitador: o ganho nunca leva o pico acima disso (None desliga)
+
+# --- ANÁLISE DE VOLUME ---
+
+AMOSTRAS_BLOCO_ANALISE = 1 << 20
+
+def analisar_pcm(amostras):
+    """
+    RMS e pico (em dBFS) de um array int16 de amostras, em blocos para não
+    converter um arquivo longo inteiro para float de uma vez.
+    """
+    amostras = amostras.reshape(-1)
+    if not len(amostras):
+        return {"rms_db": -120.0, "peak_db": -120.0}
+    soma, pico = 0.0, 0
+    for inicio in range(0, len(amostras), AMOSTRAS_BLOCO_ANALISE):
+        bloco = amostras[inicio:inicio + AMOSTRAS_BLOCO_ANALISE].astype(np.float32)
+        soma += float(np.dot(bloco, bloco))
+        pico = max(pico, float(np.abs(bloco).max()))
+    rms = (soma / len(amostras)) ** 0.5 / 32768.0
+    return {"rms_db": round(float(20 * np.log10(max(rms, 1e-6))), 2),
+            "peak_db": round(float(20 * np.log10(max(pico / 32768.0, 1e-6))), 2)}
+
+def calcular_ganho(analise, alvo_db=ALVO_RMS_DB, teto_db=TETO_PICO_DB):
+    """Ganho linear que leva o RMS ao alvo, limitado para o pico não passar do teto."""
+    ganho_db = alvo_db - analise["rms_db"]
+    if teto_db is not None:
+        ganho_db = min(ganho_db, teto_db - analise["peak_db"])
+    return 10 ** (ganho_db / 20)
+
+def amplificar(som, ganho):
+    """
+    Novo Sound com o ganho aplicado no PCM (set_volume não passa de 1.0).
+    Feito uma vez ao carregar; o que passar do limite de 16 bits é cortado.
+    """
+    amostras = pygame.sndarray.samples(som).astype(np.float32)
+    amostras *= ganho
+    np.clip(amostras, -32768, 32767, out=amostras)
+    return pygame.sndarray.make_sound(amostras.astype(np.int16))
+
+# --- CACHE DE PCM EM DISCO ---
+
+class CachePCMDisco:
+    """
+    Guarda o PCM decodificado (no formato do mixer) em arquivos .pcm, cada um com
+    um .json ao lado descrevendo a origem. A chave inclui caminho, tamanho e mtime
+    do arquivo original, então editar o arquivo invalida a entrada.
+    Os arquivos são lidos por mmap direto para pygame.mixer.Sound(buffer=...).
+    O tamanho total é limitado: ao passar do limite, as entradas usadas há mais
+    tempo são apagadas (o mtime do .pcm marca o último uso).
+    """
+    def __init__(self, pasta=PASTA_CACHE_PCM, limite_mb=LIMITE_CACHE_DISCO_MB):
+        self.pasta = pasta
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self._lock = threading.Lock()
+
+    def _chave(self, caminho):
+        info = os.stat(caminho)
+        origem = f"{os.path.abspath(caminho)}|{info.st_size}|{info.st_mtime_ns}|{pygame.mixer.get_init()}"
+        return hashlib.sha1(origem.encode("utf-8")).hexdigest()
+
+    def _arquivos(self, chave):
+        base = os.path.join(self.pasta, chave)
+        return base + ".pcm", base + ".json"
+
+    def carregar(self, caminho):
+        """Retorna o Sound do cache ou None se não houver entrada válida."""
+        arquivo_pcm, _ = self._arquivos(self._chave(caminho))
+        try:
+            with open(arquivo_pcm, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as dados:
+                    som = pygame.mixer.Sound(buffer=dados)
+            os.utime(arquivo_pcm) # Marca como usado (LRU)
+            return som
+        except (OSError, ValueError):
+            return None
+
+    def tamanho(self, caminho):
+        """Bytes de PCM da entrada do arquivo, ou None se não estiver no cache."""
+        arquivo_pcm, _ = self._arquivos(self._chave(caminho))
+        try:
+            return os.path.getsize(arquivo_pcm)
+        except OSError:
+            return None
+
+    def abrir_stream(self, caminho):
+        """SomStream lendo o PCM do cache aos poucos, ou None se não houver entrada."""
+        arquivo_pcm, _ = self._arquivos(self._chave(caminho))
+        try:
+            stream = SomStream(arquivo_pcm)
+            os.utime(arquivo_pcm)
+            return stream
+        except (OSError, ValueError):
+            return None
+
+    def abrir_stream_normalizado(self, caminho, ganho):
+        """
+        SomStream de uma cópia do PCM com o ganho já aplicado (uma entrada própria
+        no cache, gravada uma vez), ou None se não houver a entrada original.
+        """
+        chave = self._chave(caminho)
+        chave_ganho = hashlib.sha1(f"{chave}|{ganho:.4f}".encode("utf-8")).hexdigest()
+        arquivo_pcm, arquivo_meta = self._arquivos(chave_ganho)
+        if not os.path.exists(arquivo_pcm):
+            origem_pcm, origem_meta = self._arquivos(chave)
+            try:
+                with self._lock:
+                    with open(origem_meta, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    meta["gain"] = round(ganho, 4)
+                    with open(origem_pcm, "rb") as f, open(arquivo_pcm + ".tmp", "wb") as saida:
+                        # Em blocos: um som longo nunca fica inteiro na RAM como float
+                        while True:
+                            dados = f.read(AMOSTRAS_BLOCO_ANALISE * 2)
+                            if not dados:
+                                break
+                            amostras = np.frombuffer(dados, dtype=np.int16).astype(np.float32)
+                            amostras *= ganho
+                            np.clip(amostras, -32768, 32767, out=amostras)
+                            saida.write(amostras.astype(np.int16).tobytes())
+                    with open(arquivo_meta + ".tmp", "w", encoding="utf-8") as f:
+                        json.dump(meta, f)
+                    os.replace(arquivo_meta + ".tmp", arquivo_meta)
+                    os.replace(arquivo_pcm + ".tmp", arquivo_pcm)
+            except (OSError, ValueError) as e:
+                print(f"[CACHE] Could not write normalized copy of {caminho}: {e}")
+                return None
+            self.aplicar_limite()
+        try:
+            stream = SomStream(arquivo_pcm)
+            os.utime(arquivo_pcm)
+            return stream
+        except (OSError, ValueError):
+            return None
+
+    def ler_analise(self, caminho):
+        """Análise de volume guardada no .json da entrada, ou None."""
+        _, arquivo_meta = self._arquivos(self._chave(caminho))
+        try:
+            with open(arquivo_meta, "r", encoding="utf-8") as f:
+                return json.load(f).get("loudness")
+        except (OSError, ValueError):
+            return None
+
+    def gravar_analise(self, caminho, analise):
+        """Acrescenta a análise no .json de uma entrada que já existe (entradas antigas)."""
+        _, arquivo_meta = self._arquivos(self._chave(caminho))
+        try:
+            with open(arquivo_meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            meta["loudness"] = analise
+            with open(arquivo_meta + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(arquivo_meta + ".tmp", arquivo_meta)
+        except (OSError, ValueError):
+            pass
+
+    def salvar(self, caminho, som, analise=None):
+        dados = som.get_raw()
+        if not dados:
+            return
+        chave = self._chave(caminho)
+        arquivo_pcm, arquivo_meta = self._arquivos(chave)
+        info = os.stat(caminho)
+        meta = {"source": os.path.abspath(caminho), "size": info.st_size, "mtime_ns": info.st_mtime_ns}
+        if analise:
+            meta["loudness"] = analise
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            with open(arquivo_meta + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            with open(arquivo_pcm + ".tmp", "wb") as f:
+                f.write(dados)
+            os.replace(arquivo_meta + ".tmp", arquivo_meta)
+            os.replace(arquivo_pcm + ".tmp", arquivo_pcm)
+        except OSError as e:
+            print(f"[CACHE] Could not write {arquivo_pcm}: {e}")
+            return
+        self.aplicar_limite()
+
+    def _entradas(self):
+        """Lista (último uso, bytes, chave) de todas as entradas no disco."""
+        entradas = []
+        if not os.path.isdir(self.pasta):
+            return entradas
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(".pcm"):
+                try:
+                    info = os.stat(os.path.join(self.pasta, nome))
+                except OSError:
+                    continue
+                entradas.append((info.st_mtime, info.st_size, nome[:-4]))
+        return entradas
+
+    def _apagar(self, chave):
+        for arquivo in self._arquivos(chave):
+            try:
+                os.remove(arquivo)
+            except OSError:
+                pass
+
+    def aplicar_limite(self):
+        """Apaga as entradas usadas há mais tempo até caber no limite."""
+        with self._lock:
+            entradas = sorted(self._entradas())
+            total = sum(e[1] for e in entradas)
+            for _, tamanho, chave in entradas:
+                if total <= self.limite_bytes:
+                    break
+                self._apagar(chave)
+                total -= tamanho
+
+    def limpar_obsoletos(self):
+        """
+        Apaga entradas cujo arquivo original sumiu ou mudou, e aplica o limite.
+        Retorna (entradas apagadas, bytes liberados).
+        """
+        apagadas, liberados = 0, 0
+        with self._lock:
+            for _, tamanho, chave in self._entradas():
+                _, arquivo_meta = self._arquivos(chave)
+                try:
+                    with open(arquivo_meta, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    info = os.stat(meta["source"])
+                    valida = info.st_size == meta["size"] and info.st_mtime_ns == meta["mtime_ns"]
+                except (OSError, ValueError, KeyError):
+                    valida = False
+                if not valida:
+                    self._apagar(chave)
+                    apagadas += 1
+                    liberados += tamanho
+        antes = sum(e[1] for e in self._entradas())
+        self.aplicar_limite()
+        liberados += antes - sum(e[1] for e in self._entradas())
+        return apagadas, liberados
+
+
+# --- STREAMING DE SONS LONGOS ---
+
+def _bytes_por_frame():
+    _, formato, canais = pygame.mixer.get_init()
+    return (abs(formato) // 8) * canais
+
+class SomStream:
+    """
+    Som longo tocado direto do .pcm do cache em disco, em blocos de
+    DURACAO_BLOCO_STREAM segundos (o MotorAudio enfileira o próximo bloco no canal).
+    Só os blocos em uso ficam na RAM; o arquivo fica mapeado (mmap), então
+    continua legível mesmo se o cache apagar a entrada enquanto toca.
+    Os dois primeiros blocos são montados ao abrir: o disparo só dá play().
+
+    Imita a parte do pygame.mixer.Sound usada pelo app (volume e duração).
+    """
+    def __init__(self, arquivo_pcm):
+        with open(arquivo_pcm, "rb") as f:
+            self._dados = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.arquivo = arquivo_pcm
+        self.total_bytes = len(self._dados)
+        bytes_frame = _bytes_por_frame()
+        self.bytes_segundo = pygame.mixer.get_init()[0] * bytes_frame
+        self.bytes_bloco = int(pygame.mixer.get_init()[0] * DURACAO_BLOCO_STREAM) * bytes_frame
+        self._volume = 1.0
+        self._iniciais = [] # bloco() consulta esta lista
+        self._iniciais = [bloco for bloco in (self.bloco(0), self.bloco(1)) if bloco is not None]
+
+    def amostras(self):
+        """O PCM inteiro como array int16, sem copiar (direto do mmap)."""
+        return np.frombuffer(self._dados, dtype=np.int16)
+
+    def set_volume(self, volume):
+        self._volume = volume
+        for bloco in self._iniciais:
+            bloco.set_volume(volume)
+
+    def get_volume(self):
+        return self._volume
+
+    def get_length(self):
+        return self.total_bytes / self.bytes_segundo
+
+    @property
+    def memoria(self):
+        """RAM usada: os dois blocos iniciais e, ao tocar, o bloco tocando e o enfileirado."""
+        return min(4 * self.bytes_bloco, self.total_bytes)
+
+    def bloco(self, indice):
+        """Sound com o bloco `indice`, ou None depois do fim do arquivo."""
+        if indice < len(self._iniciais):
+            return self._iniciais[indice]
+        inicio = indice * self.bytes_bloco
+        if inicio >= self.total_bytes:
+            return None
+        som = pygame.mixer.Sound(buffer=self._dados[inicio:inicio + self.bytes_bloco])
+        som.set_volume(self._volume)
+        return som
+
+
+# --- CACHE DE SONS DECODIFICADOS ---
+
+def tamanho_som(som):
+    """Bytes de PCM ocupados pelo Sound no formato atual do mixer."""
+    if isinstance(som, SomStream):
+        return som.memoria
+    freq, formato, canais = pygame.mixer.get_init()
+    return int(som.get_length() * freq) * (abs(formato) // 8) * canais
+
+class CacheSons:
+    """
+    Guarda os pygame.mixer.Sound já decodificados, indexados por (caminho, mtime).
+    Um arquivo só é decodificado de novo se for modificado no disco.
+
+    É um LRU limitado por memória: usar um som o torna o mais recente, e para
+    caber um som novo os menos usados (perfis antigos) são descartados. Os sons
+    do banco ativo (fixar) nunca saem: o banco ainda os seguraria na RAM.
+
+    Com o cache em disco, sons maiores que `limite_stream_mb` viram SomStream:
+    na RAM só contam os blocos do streaming. Quando o orçamento acaba, os sons
+    seguintes também tocam em streaming; sem cache em disco, são recusados.
+
+    Cada som é analisado (RMS e pico) uma vez; a análise fica no .json do cache
+    em disco. Com `normalizar`, o ganho de cada som sai daí: até 1.0 vira o
+    ganho(caminho) usado no set_volume, acima de 1.0 é aplicado no PCM aqui.
+    Nada disso roda no disparo.
+    """
+    def __init__(self, limite_mb=LIMITE_CACHE_MB, disco=None, limite_stream_mb=LIMITE_STREAM_MB,
+                 normalizar=False, alvo_db=ALVO_RMS_DB, teto_db=TETO_PICO_DB):
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self.limite_stream = limite_stream_mb * 1024 * 1024
+        self.disco = disco # CachePCMDisco opcional
+        self.normalizar = normalizar
+        self.alvo_db = alvo_db
+        self.teto_db = teto_db
+        self.total_bytes = 0
+        self._sons = collections.OrderedDict()
+        self._tamanhos = {}
+        self._ganhos = {}
+        self.analises = {} # caminho -> {"rms_db", "peak_db"}
+        self._em_uso = frozenset() # Caminhos do banco ativo (não são expulsos)
+        self._lock = threading.Lock()
+
+    def _chave(self, caminho):
+        # O formato do mixer entra na chave: o Sound já é convertido para ele ao decodificar
+        return (caminho, os.path.getmtime(caminho), pygame.mixer.get_init())
+
+    def obter(self, caminho, recente=True):
+        """
+        Retorna o Sound do arquivo, decodificando só se preciso.
+        recente=False coloca o som no fim da fila do LRU (usado no pré-carregamento,
+        para não expulsar sons de perfis usados de verdade).
+        """
+        chave = self._chave(caminho)
+        with self._lock:
+            som = self._sons.get(chave)
+            if som is not None:
+                if recente:
+                    self._sons.move_to_end(chave)
+                return som
+
+        # Decodifica fora do lock (pode demorar); o cache em disco evita o decoder
+        som, analise, reservado = self._carregar(caminho, recente)
+        if analise is None: # Entrada do disco criada antes da análise existir
+            amostras = som.amostras() if isinstance(som, SomStream) else pygame.sndarray.samples(som)
+            analise = analisar_pcm(amostras)
+            self.disco.gravar_analise(caminho, analise)
+        som, ganho = self._normalizar(caminho, som, analise)
+
+        with self._lock:
+            # Descarta versões antigas do mesmo arquivo
+            for antiga in [c for c in self._sons if c[0] == caminho]:
+                self._remover(antiga)
+            self._sons[chave] = som
+            self._ganhos[chave] = ganho
+            self.analises[caminho] = analise
+            # Som completo: os bytes já foram reservados; streaming conta só os blocos
+            self._tamanhos[chave] = reservado or tamanho_som(som)
+            self.total_bytes += self._tamanhos[chave] - reservado
+            self._sons.move_to_end(chave, last=recente)
+        return som
+
+    def _carregar(self, caminho, recente):
+        """
+        Lê o PCM do cache em disco ou decodifica o arquivo. Um som completo só fica
+        na RAM se couber no orçamento (limite_bytes); senão vira SomStream, ou,
+        sem cache em disco, é recusado com MemoryError.
+        Retorna (som, análise ou None, bytes reservados no orçamento).
+        """
+        disco = self.disco
+        tamanho = disco.tamanho(caminho) if disco else None
+        if tamanho is not None:
+            if tamanho <= self.limite_stream and self._reservar(caminho, tamanho, recente):
+                som = disco.carregar(caminho)
+                if som is not None:
+                    return som, disco.ler_analise(caminho), tamanho
+                self._liberar(tamanho)
+            som = disco.abrir_stream(caminho)
+            if som is not None:
+                return som, disco.ler_analise(caminho), 0
+
+        # Sem cache em disco e sem espaço: nem decodifica
+        if not disco and not self._reservar(caminho, 0, recente):
+            raise MemoryError(f"audio cache_mb budget is full, not loading {os.path.basename(caminho)}")
+        som = pygame.mixer.Sound(caminho)
+        analise = analisar_pcm(pygame.sndarray.samples(som))
+        tamanho = tamanho_som(som)
+        if disco:
+            disco.salvar(caminho, som, analise)
+            # Longo demais para a RAM: o PCM completo só existe durante esta primeira decodificação
+            if tamanho > self.limite_stream:
+                stream = disco.abrir_stream(caminho)
+                if stream is not None:
+                    return stream, analise, 0
+        if self._reservar(caminho, tamanho, recente):
+            return som, analise, tamanho
+        stream = disco.abrir_stream(caminho) if disco else None
+        if stream is None:
+            raise MemoryError(f"audio cache_mb budget is full, not loading {os.path.basename(caminho)}")
+        return stream, analise, 0
+
+    def _normalizar(self, caminho, som, analise):
+        """Retorna (som, ganho para o set_volume) conforme a análise de volume."""
+        if not self.normalizar:
+            return som, 1.0
+        ganho = calcular_ganho(analise, self.alvo_db, self.teto_db)
+        if ganho <= 1.0:
+            return som, ganho
+        # Acima de 1.0 o set_volume não alcança: o ganho vai para o PCM (uma vez, ao carregar)
+        if not isinstance(som, SomStream):
+            return amplificar(som, ganho), 1.0
+        # Streaming: toca de uma cópia já amplificada no disco (nada por bloco no disparo)
+        normalizado = self.disco.abrir_stream_normalizado(caminho, ganho)
+        if normalizado is None:
+            return som, 1.0 # Sem a cópia, toca no volume original
+        return normalizado, 1.0
+
+    def ganho(self, caminho):
+        """Ganho de normalização do som já carregado (1.0 se não houver)."""
+        try:
+            chave = self._chave(caminho)
+        except OSError:
+            return 1.0
+        with self._lock:
+            return self._ganhos.get(chave, 1.0)
+
+    def tem_espaco(self):
+        with self._lock:
+            return self.total_bytes < self.limite_bytes
+
+    def fixar(self, caminhos):
+        """
+        Marca os arquivos do banco ativo: enquanto o banco segura esses Sound,
+        tirá-los do cache não libera memória nenhuma, então eles nunca são expulsos.
+        """
+        with self._lock:
+            self._em_uso = frozenset(caminhos)
+
+    def _reservar(self, caminho, bytes_som, recente):
+        """
+        Reserva bytes_som no orçamento, expulsando sons fora do banco ativo se
+        preciso. recente=False (pré-carregamento) só usa espaço livre.
+        Retorna False se não couber.
+        """
+        with self._lock:
+            # A versão antiga do mesmo arquivo vai ser substituída
+            for antiga in [c for c in self._sons if c[0] == caminho]:
+                self._remover(antiga)
+            if recente:
+                self._expulsar(bytes_som)
+            if self.total_bytes + bytes_som > self.limite_bytes:
+                return False
+            self.total_bytes += bytes_som
+            return True
+
+    def _liberar(self, bytes_som):
+        with self._lock:
+            self.total_bytes -= bytes_som
+
+    def _remover(self, chave):
+        del self._sons[chave]
+        self._ganhos.pop(chave, None)
+        self.total_bytes -= self._tamanhos.pop(chave)
+
+    def _expulsar(self, necessario):
+        """Tira os menos usados, pulando os do banco ativo, até caberem `necessario` bytes."""
+        for chave in list(self._sons):
+            if self.total_bytes + necessario <= self.limite_bytes:
+                break
+            if chave[0] not in self._em_uso:
+                self._remover(chave)
+
+
+# --- BANCOS DE SONS POR PERFIL ---
+
+# Estados de cada slot durante o carregamento
+SLOT_CARREGANDO = "loading"
+SLOT_PRONTO = "ready"
+SLOT_ERRO = "error"
+SLOT_AUSENTE = "missing"
+
+def _nome_exibicao(gesto_str, caminho, aliases):
+    # LÓGICA NOVA: Prioriza o Alias, senão usa nome do arquivo
+    if gesto_str in aliases:
+        return aliases[gesto_str]
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+def carregar_slot(cache, qtd, gesto_str, caminho, aliases, vol, avisar):
+    """Decodifica (ou pega do cache) o som de um slot. Retorna o item do banco, ou None se falhou."""
+    try:
+        som = cache.obter(caminho)
+        # Ganho de normalização do slot calculado agora: no disparo é só play()
+        ganho = cache.ganho(caminho)
+        som.set_volume(vol * ganho)
+        nome_exibicao = _nome_exibicao(gesto_str, caminho, aliases)
+        item = {"obj": som, "txt": nome_exibicao, "ganho": ganho}
+        stream = isinstance(som, SomStream)
+        avisar(qtd, SLOT_PRONTO, (tamanho_som(som), stream))
+        extra = " (streaming)" if stream else ""
+        analise = cache.analises.get(caminho)
+        if cache.normalizar and analise:
+            ganho_db = 20 * np.log10(calcular_ganho(analise, cache.alvo_db, cache.teto_db))
+            extra += f" (RMS {analise['rms_db']:.1f} dB, gain {ganho_db:+.1f} dB)"
+        print(f"[OK] Gesture {qtd}: {nome_exibicao}{extra}")
+        return item
+    except Exception as e:
+        avisar(qtd, SLOT_ERRO)
+        print(f"[ERRO] Error loading {caminho}: {e}")
+        return None
+
+def montar_banco(cache, dados_perfil, vol, pool=None, ao_mudar_estado=None):
+    """
+    Monta o dicionário {gesto: {"obj": Sound, "txt": nome, "ganho": normalização}} de um perfil.
+    Com um pool, os arquivos são decodificados em paralelo; ao_mudar_estado(gesto, estado, memoria)
+    é chamado conforme cada slot começa e termina de carregar. `memoria` é
+    (bytes na RAM, streaming?) quando o slot fica pronto, senão None.
+    """
+    gestos = dados_perfil.get("gestures", {})
+    aliases = dados_perfil.get("aliases", {})
+    avisar = ao_mudar_estado or (lambda gesto, estado, memoria=None: None)
+    novos_sons = {}
+
+    slots = []
+    for gesto_str, caminho in gestos.items():
+        if not caminho:
+            continue
+        try:
+            qtd = chave_gesto(gesto_str) # Número (soma dos dedos) ou pose, ex: "L01100"
+        except ValueError as e:
+            print(f"[ERRO] Skipping {caminho}: {e}")
+            continue
+        if not os.path.exists(caminho):
+            avisar(qtd, SLOT_AUSENTE)
+            continue
+        avisar(qtd, SLOT_CARREGANDO)
+        slots.append((qtd, gesto_str, caminho))
+
+    def carregar(slot):
+        qtd, gesto_str, caminho = slot
+        item = carregar_slot(cache, qtd, gesto_str, caminho, aliases, vol, avisar)
+        if item:
+            novos_sons[qtd] = item
+
+    if pool:
+        for tarefa in [pool.submit(carregar, slot) for slot in slots]:
+            tarefa.result()
+    else:
+        for slot in slots:
+            carregar(slot)
+
+    return novos_sons
+
+class BancosSons:
+    """
+    Carrega os bancos de sons fora da thread da interface.
+    O banco do perfil ativo é montado primeiro, com os arquivos decodificados em
+    paralelo, e entregue pronto (troca atômica); depois os outros perfis são
+    pré-carregados enquanto houver memória no cache.
+
+    `ao_mudar_estado(gesto, estado, memoria)` avisa a interface a cada mudança
+    de estado de um slot do perfil ativo (loading/ready/...); quem guarda os estados é ela.
+    """
+    def __init__(self, cache, workers=None):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bancos")
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix="decodificar")
+        self._geracao = 0
+        self._recentes = [] # Nomes dos perfis, do mais recente para o mais antigo
+        self.carregando = frozenset()
+        self.ao_mudar_estado = None
+
+    def ativar(self, nome, dados_perfil, vol, ao_pronto):
+        """
+        Monta o banco em segundo plano e chama ao_pronto(banco) quando terminar.
+        Se outra ativação for pedida antes, o resultado antigo é descartado.
+        """
+        self._geracao += 1
+        geracao = self._geracao
+        if nome in self._recentes:
+            self._recentes.remove(nome)
+        self._recentes.insert(0, nome)
+
+        def mudar_estado(gesto, estado, memoria=None):
+            if geracao != self._geracao:
+                return
+            if estado == SLOT_CARREGANDO:
+                # Sempre um conjunto novo: a câmera lê sem lock
+                self.carregando = self.carregando | {gesto}
+            self._avisar(gesto, estado, memoria)
+
+        def tarefa():
+            self.carregando = frozenset()
+            self.cache.fixar(caminho for caminho in dados_perfil.get("gestures", {}).values() if caminho)
+            banco = montar_banco(self.cache, dados_perfil, vol, self._pool, mudar_estado)
+            if geracao == self._geracao:
+                ao_pronto(banco)
+                # Só deixa de estar "carregando" depois da troca do banco
+                self.carregando = frozenset()
+            return banco
+
+        return self._executor.submit(tarefa)
+
+    def _avisar(self, gesto, estado, memoria=None):
+        if self.ao_mudar_estado:
+            self.ao_mudar_estado(gesto, estado, memoria)
+
+    def recarregar_arquivo(self, caminho, dados_perfil, vol, ao_pronto):
+        """
+        Recarrega só os slots do perfil ativo que usam `caminho` (o arquivo mudou,
+        sumiu ou voltou) e chama ao_pronto(itens, removidos): os itens novos
+        ({gesto: item}) e os gestos que ficaram sem som.
+        Roda na mesma fila das ativações, então nunca se mistura com uma troca de
+        perfil; se outra ativação foi pedida nesse meio tempo, não faz nada.
+        Enquanto decodifica, o som antigo continua tocando normalmente.
+        """
+        geracao = self._geracao
+
+        def tarefa():
+            aliases = dados_perfil.get("aliases", {})
+            slots = []
+            for gesto_str, caminho_slot in dados_perfil.get("gestures", {}).items():
+                if caminho_slot == caminho:
+                    try:
+                        slots.append((chave_gesto(gesto_str), gesto_str))
+                    except ValueError:
+                        pass
+            if not slots or geracao != self._geracao:
+                return
+
+            antes = assinatura(caminho)
+            itens, removidos = {}, []
+            for qtd, gesto_str in slots:
+                if antes is None:
+                    self._avisar(qtd, SLOT_AUSENTE)
+                    removidos.append(qtd)
+                    continue
+                self._avisar(qtd, SLOT_CARREGANDO)
+                item = carregar_slot(self.cache, qtd, gesto_str, caminho, aliases, vol, self._avisar)
+                if item:
+                    itens[qtd] = item
+                else:
+                    removidos.append(qtd)
+            # Arquivo ainda sendo gravado: o vigia avisa de novo quando terminar
+            if antes is not None and assinatura(caminho) != antes:
+                return
+            if geracao == self._geracao:
+                ao_pronto(itens, removidos)
+
+        self._executor.submit(tarefa)
+
+    def preaquecer(self, perfis):
+        """
+        Decodifica os sons dos outros perfis ({nome: dados}), dos usados mais
+        recentemente para os nunca usados, sem expulsar nada do cache.
+        """
+        geracao = self._geracao
+        ordem = sorted(perfis, key=lambda n: self._recentes.index(n) if n in self._recentes else len(self._recentes))
+
+        def tarefa():
+            for dados_perfil in (perfis[nome] for nome in ordem):
+                for caminho in dados_perfil.get("gestures", {}).values():
+                    # Uma ativação nova tem prioridade; sem espaço, para de pré-carregar
+                    if geracao != self._geracao or not self.cache.tem_espaco():
+                        return
+                    if caminho and os.path.exists(caminho):
+                        try:
+                            self.cache.obter(caminho, recente=False)
+                        except MemoryError:
+                            return
+                        except Exception as e:
+                            print(f"[ERRO] Error preloading {caminho}: {e}")
+
+        self._executor.submit(tarefa)
+
+
+# --- MOTOR DE REPRODUÇÃO ---
+
+# Políticas de redisparo por gesto ("policies" no perfil)
+POLITICA_SOBREPOR = "overlap"  # Toca outra voz por cima das que já estão tocando
+POLITICA_REINICIAR = "restart" # Para o som do próprio gesto e toca do começo
+POLITICA_IGNORAR = "ignore"    # Não faz nada enquanto o som do gesto ainda toca
+POLITICAS = (POLITICA_SOBREPOR, POLITICA_REINICIAR, POLITICA_IGNORAR)
+
+# Qual voz roubar quando todas estão ocupadas
+ROUBO_MAIS_ANTIGA = "oldest"
+ROUBO_MAIS_BAIXA = "quietest"
+
+class MotorAudio:
+    """
+    Dono do pygame.mixer: escolhe o buffer pelo perfil de latência e reserva
+    um número fixo de canais (vozes) só para o soundpad.
+
+    Também gerencia as vozes: lembra qual gesto toca em cada canal para aplicar
+    a política de redisparo e os grupos de corte (choke), e rouba uma voz quando
+    todas estão ocupadas. Nunca usa mais canais do que `vozes`.
+
+    SomStream toca bloco a bloco: uma thread enfileira o próximo bloco no canal
+    (Channel.queue) assim que o anterior começa a tocar.
+    """
+    def __init__(self, perfil="normal", vozes=8, roubo=ROUBO_MAIS_ANTIGA):
+        if isinstance(perfil, int):
+            self.buffer = perfil
+        else:
+            self.buffer = PERFIS_LATENCIA.get(perfil, PERFIS_LATENCIA["normal"])
+        self.vozes = vozes
+        self.roubo = roubo
+        self.canais = []
+        self._inicio_canal = {}
+        self._voz_canal = {} # canal -> (gesto, grupo, som)
+        self._tempos_play = collections.deque(maxlen=50)
+        self.roubadas = 0
+        self._streams = {} # canal -> [SomStream, próximo bloco]
+        self._lock_streams = threading.Lock()
+        self._tem_stream = threading.Event()
+        self._alimentador = None
+
+    def iniciar(self):
+        pygame.mixer.pre_init(frequency=FREQUENCIA, size=-16, channels=2, buffer=self.buffer)
+        pygame.mixer.init()
+        pygame.mixer.set_num_channels(self.vozes)
+        # Canais reservados não são usados pelo Sound.play() automático do pygame
+        pygame.mixer.set_reserved(self.vozes)
+        self.canais = [pygame.mixer.Channel(i) for i in range(self.vozes)]
+        print(f"[AUDIO] {FREQUENCIA} Hz, buffer {self.buffer} "
+              f"(~{self.latencia_buffer_ms():.0f} ms), {self.vozes} voices, {self.roubo}-first stealing")
+
+    def tocar(self, som, gesto=None, politica=POLITICA_SOBREPOR, grupo=None):
+        """
+        Toca o som aplicando a política do gesto. Retorna o canal usado,
+        ou None se a política mandou ignorar o disparo.
+        `grupo`: ao tocar, corta todas as vozes do mesmo grupo (ex: chimbal aberto/fechado).
+        """
+        ativas = {c: voz for c, voz in self._voz_canal.items() if c.get_busy()}
+        do_gesto = [c for c, voz in ativas.items() if gesto is not None and voz[0] == gesto]
+
+        if politica == POLITICA_IGNORAR and do_gesto:
+            return None
+
+        cortadas = []
+        if politica == POLITICA_REINICIAR:
+            cortadas += do_gesto
+        if grupo is not None:
+            cortadas += [c for c, voz in ativas.items() if voz[1] == grupo]
+
+        # Reaproveita um canal recém-cortado; senão um livre; senão rouba
+        canal = cortadas[0] if cortadas else self._canal_livre()
+
+        with self._lock_streams:
+            # Sob o lock: o alimentador não pode enfileirar num canal que está sendo parado
+            for c in cortadas + [canal]:
+                self._streams.pop(c, None)
+            for c in cortadas:
+                c.stop()
+
+            t0 = time.perf_counter()
+            if isinstance(som, SomStream):
+                canal.play(som.bloco(0))
+                proximo = som.bloco(1)
+                if proximo is not None:
+                    canal.queue(proximo)
+                    self._streams[canal] = [som, 2]
+                    self._iniciar_alimentador()
+            else:
+                canal.play(som)
+            self._tempos_play.append(time.perf_counter() - t0)
+        self._inicio_canal[canal] = time.time()
+        self._voz_canal[canal] = (gesto, grupo, som)
+        return canal
+
+    def _canal_livre(self):
+        for canal in self.canais:
+            if not canal.get_busy():
+                return canal
+        self.roubadas += 1
+        if self.roubo == ROUBO_MAIS_BAIXA:
+            # Menor ganho efetivo; no empate, a que está mais perto de acabar
+            return min(self.canais, key=lambda c: (self._ganho(c), -self._fracao_tocada(c)))
+        return min(self.canais, key=lambda c: self._inicio_canal.get(c, 0))
+
+    def _ganho(self, canal):
+        som = self._voz_canal.get(canal, (None, None, None))[2]
+        return canal.get_volume() * (som.get_volume() if som else 1.0)
+
+    def _fracao_tocada(self, canal):
+        som = self._voz_canal.get(canal, (None, None, None))[2]
+        duracao = som.get_length() if som else 0
+        if duracao <= 0:
+            return 1.0
+        return (time.time() - self._inicio_canal.get(canal, 0)) / duracao
+
+    def parar_tudo(self, fade_ms=0):
+        """Para todas as vozes do soundpad (gesto de parar)."""
+        with self._lock_streams:
+            self._streams.clear()
+            for canal in self.canais:
+                if fade_ms:
+                    canal.fadeout(fade_ms)
+                else:
+                    canal.stop()
+        self._voz_canal.clear()
+
+    def _iniciar_alimentador(self):
+        self._tem_stream.set()
+        if self._alimentador is None:
+            self._alimentador = threading.Thread(target=self._alimentar_streams, daemon=True,
+                                                 name="streaming")
+            self._alimentador.start()
+
+    def _alimentar_streams(self):
+        # Acorda a cada 50 ms só enquanto há streams tocando (blocos de 0,5 s dão folga de sobra)
+        while True:
+            self._tem_stream.wait()
+            time.sleep(0.05)
+            with self._lock_streams:
+                for canal, estado in list(self._streams.items()):
+                    if not canal.get_busy():
+                        del self._streams[canal]
+                    elif canal.get_queue() is None:
+                        som, indice = estado
+                        bloco = som.bloco(indice)
+                        if bloco is None:
+                            del self._streams[canal]
+                        else:
+                            canal.queue(bloco)
+                            estado[1] = indice + 1
+                if not self._streams:
+                    self._tem_stream.clear()
+
+    def latencia_buffer_ms(self):
+        return self.buffer / FREQUENCIA * 1000
+
+    def latencia_estimada_ms(self):
+        """
+        Latência disparo -> primeira amostra.
+        O pygame não expõe o relógio do dispositivo, então somamos o custo medido
+        da chamada play() com até dois períodos de buffer (mixagem + saída).
+        """
+        if self._tempos_play:
+            custo_play = sum(self._tempos_play) / len(self._tempos_play) * 1000
+        else:
+            custo_play = 0.0
+        return custo_play + 2 * self.latencia_buffer_ms()
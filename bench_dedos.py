@@ -0,0 +1,78 @@
+"""
+Micro-benchmark da contagem de dedos por frame:
+- count_fingers original (atributo por atributo);
+- caminho quente atual (ler_maos + indice_gesto, só os landmarks usados);
+- conversão para array + NumPy (referência: por frame perde, serve para gravações).
+Uso: python bench_dedos.py [frames]
+"""
+import sys
+import time
+import random
+from types import SimpleNamespace
+
+from helpers import (count_fingers, landmarks_para_array, codigos_em_lote, ler_maos, indice_gesto,
+                     maos_validas, somar_dedos)
+from gestos import CONTAGENS
+
+def gerar_maos(qtd_maos, rng):
+    """Cria mãos falsas no mesmo formato do MediaPipe (landmark[i].x/.y/.z)."""
+    try:
+        # Usa o protobuf de verdade quando o MediaPipe está instalado (acesso a atributo mais caro)
+        from mediapipe.framework.formats import landmark_pb2
+        maos = []
+        for _ in range(qtd_maos):
+            mao = landmark_pb2.NormalizedLandmarkList()
+            for _ in range(21):
+                mao.landmark.add(x=rng.random(), y=rng.random(), z=rng.random())
+            maos.append(mao)
+        return maos
+    except ImportError:
+        return [SimpleNamespace(landmark=[SimpleNamespace(x=rng.random(), y=rng.random(), z=rng.random())
+                                          for _ in range(21)])
+                for _ in range(qtd_maos)]
+
+def versao_antiga(multi_hand_landmarks):
+    """Lógica original do main_camera_loop: checagem de pulso + count_fingers por mão."""
+    total = 0
+    ignorar_segunda_mao = False
+    if len(multi_hand_landmarks) == 2:
+        pulso1 = multi_hand_landmarks[0].landmark[0]
+        pulso2 = multi_hand_landmarks[1].landmark[0]
+        if abs(pulso1.x - pulso2.x) < 0.1 and abs(pulso1.y - pulso2.y) < 0.1:
+            ignorar_segunda_mao = True
+    for i, hand_lms in enumerate(multi_hand_landmarks):
+        if i == 1 and ignorar_segunda_mao:
+            continue
+        total += count_fingers(hand_lms)
+    return total
+
+def versao_atual(multi_hand_landmarks):
+    codigos, pulsos = ler_maos(multi_hand_landmarks)
+    indice, _ = indice_gesto(codigos, pulsos, [0, 1])
+    return CONTAGENS[indice]
+
+def versao_array(multi_hand_landmarks):
+    maos = landmarks_para_array(multi_hand_landmarks)
+    return somar_dedos(codigos_em_lote(maos).tolist(), maos_validas(maos[:, 0, :2].tolist()))
+
+def medir(funcao, frames):
+    inicio = time.perf_counter()
+    for maos in frames:
+        funcao(maos)
+    return (time.perf_counter() - inicio) / len(frames) * 1e6
+
+if __name__ == "__main__":
+    qtd_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(42)
+    frames = [gerar_maos(2, rng) for _ in range(qtd_frames)]
+
+    # As duas versões precisam concordar antes de comparar tempo
+    divergencias = sum(versao_antiga(f) != versao_atual(f) or versao_antiga(f) != versao_array(f) for f in frames)
+    print(f"Frames: {qtd_frames} (2 hands each), mismatches: {divergencias}")
+
+    antiga = medir(versao_antiga, frames)
+    atual = medir(versao_atual, frames)
+    array = medir(versao_array, frames)
+    print(f"count_fingers  : {antiga:8.1f} us/frame")
+    print(f"Hot path       : {atual:8.1f} us/frame ({antiga / atual:.2f}x)")
+    print(f"Array + NumPy  : {array:8.1f} us/frame ({antiga / array:.2f}x)")
@@ -0,0 +1,322 @@
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+import cv2
+
+# --- CONFIGURAÇÃO DA CAPTURA ---
+
+# Valores padrão; "camera" no config.json (global ou dentro do perfil) sobrescreve cada chave
+PADRAO_CAPTURA = {
+    "device": 0,         # Índice da webcam
+    "backend": "auto",   # auto, dshow, msmf, v4l2, avfoundation, gstreamer
+    "width": 640,
+    "height": 480,
+    "fps": 30,
+    "fourcc": "MJPG",    # MJPG costuma liberar 30/60 fps onde YUYV fica em 5-10 fps
+    "buffer_size": 1,    # Frames no buffer do driver (menos = menos atraso)
+    "source": "webcam",  # Ou um arquivo de vídeo / pasta de imagens (testes de carga sem câmera)
+    "pacing": "realtime",# Arquivos: "realtime" (no FPS do vídeo) ou "fast" (o mais rápido possível)
+    "loops": 1,          # Arquivos: quantas vezes repetir
+}
+
+BACKENDS = {
+    "auto": "CAP_ANY",
+    "dshow": "CAP_DSHOW",
+    "msmf": "CAP_MSMF",
+    "v4l2": "CAP_V4L2",
+    "avfoundation": "CAP_AVFOUNDATION",
+    "gstreamer": "CAP_GSTREAMER",
+}
+
+def config_captura(dados_config):
+    """Junta padrão < "camera" global < "camera" do perfil ativo."""
+    perfil = dados_config.get("profiles", {}).get(dados_config.get("current_profile"), {})
+    config = dict(PADRAO_CAPTURA)
+    config.update(dados_config.get("camera", {}))
+    config.update(perfil.get("camera", {}))
+    return config
+
+def configs_cameras(dados_config, sobrescrever=None):
+    """
+    Configs de todas as câmeras: a lista "cameras" do config.json (cada item
+    sobrescreve a config única, ex: [{"name": "desk", "device": 0}, {"name": "side", "device": 1}])
+    ou, sem a lista, só a câmera única.
+    `sobrescrever` (ex: --source da linha de comando) troca tudo por uma fonte só.
+    """
+    base = config_captura(dados_config)
+    sobrescrever = sobrescrever or {}
+    # Merge por desempacotamento: a chave da linha de comando vence a do config (nunca repete argumento)
+    if "source" in sobrescrever:
+        return [{**base, "name": "cli", **sobrescrever}]
+    configs = [{**base, **camera, **sobrescrever} for camera in dados_config.get("cameras", [])] or \
+              [{**base, **sobrescrever}]
+    for config in configs:
+        config.setdefault("name", f"cam{config['device']}")
+    return configs
+
+def _fourcc_texto(valor):
+    valor = int(valor)
+    return "".join(chr((valor >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00")
+
+def abrir_camera(config, silencioso=False):
+    """
+    Abre a webcam com o backend, formato, resolução, FPS e buffer pedidos.
+    A câmera pode recusar alguns valores: o que ela realmente entregou é impresso.
+    Com "source" apontando para um vídeo ou uma pasta de imagens, abre o arquivo no lugar.
+    """
+    fonte = config.get("source", "webcam")
+    if fonte and fonte != "webcam":
+        return abrir_arquivo(config, silencioso)
+
+    backend = getattr(cv2, BACKENDS.get(config.get("backend", "auto"), "CAP_ANY"), cv2.CAP_ANY)
+    cap = cv2.VideoCapture(config.get("device", 0), backend)
+    if not cap.isOpened():
+        if not silencioso:
+            print(f"[ERRO] Could not open camera {config.get('device', 0)} ({config.get('backend', 'auto')})")
+        return cap
+
+    # O FOURCC vem antes da resolução: em vários drivers o modo depende do formato
+    if config.get("fourcc"):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config["fourcc"][:4].ljust(4)))
+    if config.get("width") and config.get("height"):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, config["width"])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config["height"])
+    if config.get("fps"):
+        cap.set(cv2.CAP_PROP_FPS, config["fps"])
+    if config.get("buffer_size"):
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, config["buffer_size"])
+
+    if not silencioso:
+        print(f"[CAMERA] {descrever_modo(cap)} via {cap.getBackendName()}")
+    return cap
+
+def descrever_modo(cap):
+    largura = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    altura = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    return f"{largura}x{altura} @ {cap.get(cv2.CAP_PROP_FPS):.0f} fps {_fourcc_texto(cap.get(cv2.CAP_PROP_FOURCC)) or '?'}"
+
+# --- FONTES DE ARQUIVO (vídeo / pasta de imagens) ---
+
+EXTENSOES_IMAGEM = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+class FonteArquivo(ABC):
+    """
+    Base das fontes gravadas. Tem a mesma interface que o pipeline usa do
+    cv2.VideoCapture (isOpened / read / release / get) e um relógio de mídia:
+    tempo_frame() é o instante do frame pela posição no vídeo, então a máquina
+    de gestos vê os mesmos tempos em qualquer ritmo.
+
+    pacing "realtime" espera o intervalo entre frames (como uma câmera, pode
+    descartar frames); "fast" lê o mais rápido possível e, com sem_descarte,
+    o pipeline processa todos os frames (repetível entre execuções).
+    """
+    def __init__(self, nome, fps, pacing="realtime", loops=1):
+        self.nome = nome
+        self.fps_midia = fps or 30.0
+        self.tempo_real = pacing != "fast"
+        self.sem_descarte = not self.tempo_real
+        self.loops = max(1, int(loops))
+        self._indice = 0
+        self._inicio = None
+
+    def tempo_frame(self):
+        return self._inicio + (self._indice - 1) / self.fps_midia
+
+    def _marcar_frame(self):
+        if self._inicio is None:
+            self._inicio = time.time()
+        self._indice += 1
+        if self.tempo_real:
+            espera = self.tempo_frame() - time.time()
+            if espera > 0:
+                time.sleep(espera)
+
+    @abstractmethod
+    def _ler(self):
+        """Próximo frame do arquivo (img) ou None no fim de uma passada."""
+
+    @abstractmethod
+    def _rebobinar(self):
+        """Volta para o primeiro frame (usado a cada repetição de "loops")."""
+
+    def read(self):
+        img = self._ler()
+        if img is None and self.loops > 1:
+            self.loops -= 1
+            self._rebobinar()
+            img = self._ler()
+        if img is None:
+            return False, None
+        self._marcar_frame()
+        return True, img
+
+    def get(self, propriedade):
+        if propriedade == cv2.CAP_PROP_FPS:
+            return self.fps_midia
+        return 0.0
+
+    def getBackendName(self):
+        return "file"
+
+    def descrever(self):
+        ritmo = "real time" if self.tempo_real else "as fast as possible"
+        return f"{self.nome} @ {self.fps_midia:.0f} fps, {ritmo}"
+
+
+class FonteVideo(FonteArquivo):
+    def __init__(self, caminho, pacing="realtime", loops=1):
+        self._cap = cv2.VideoCapture(caminho)
+        super().__init__(os.path.basename(caminho), self._cap.get(cv2.CAP_PROP_FPS), pacing, loops)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def _ler(self):
+        ok, img = self._cap.read()
+        return img if ok else None
+
+    def _rebobinar(self):
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        self._cap.release()
+
+
+class FonteImagens(FonteArquivo):
+    """Pasta de frames (ordenados pelo nome); o FPS vem do "fps" da config."""
+    def __init__(self, pasta, fps=30, pacing="realtime", loops=1):
+        super().__init__(os.path.basename(os.path.normpath(pasta)), fps, pacing, loops)
+        self.arquivos = sorted(os.path.join(pasta, nome) for nome in os.listdir(pasta)
+                               if nome.lower().endswith(EXTENSOES_IMAGEM))
+        self._posicao = 0
+
+    def isOpened(self):
+        return bool(self.arquivos)
+
+    def _ler(self):
+        while self._posicao < len(self.arquivos):
+            img = cv2.imread(self.arquivos[self._posicao])
+            self._posicao += 1
+            if img is not None:
+                return img
+        return None
+
+    def _rebobinar(self):
+        self._posicao = 0
+
+    def release(self):
+        pass
+
+
+def abrir_arquivo(config, silencioso=False):
+    caminho = config["source"]
+    pacing, loops = config.get("pacing", "realtime"), config.get("loops", 1)
+    if os.path.isdir(caminho):
+        fonte = FonteImagens(caminho, config.get("fps"), pacing, loops)
+    else:
+        fonte = FonteVideo(caminho, pacing, loops)
+    if not silencioso:
+        if fonte.isOpened():
+            print(f"[CAMERA] File source {fonte.descrever()}")
+        else:
+            print(f"[ERRO] Could not open source {caminho}")
+    return fonte
+
+# --- SONDAGEM DE MODOS ---
+
+RESOLUCOES_SONDA = [(640, 480), (848, 480), (960, 540), (1280, 720)]
+FOURCCS_SONDA = ["MJPG", "YUYV"]
+FPS_SONDA = [60, 30]
+
+def backends_da_plataforma():
+    if sys.platform.startswith("win"):
+        return ["dshow", "msmf"]
+    if sys.platform == "darwin":
+        return ["avfoundation"]
+    return ["v4l2"]
+
+def medir_modo(config, hands=None, frames=45, aquecimento=10):
+    """
+    Abre a câmera no modo pedido e mede o que ela entrega de verdade.
+    Retorna um dict com o modo obtido, fps real, intervalo médio entre frames,
+    custo de flip + conversão + IA por frame e taxa de detecção de mão (se `hands`).
+    None se a câmera não abriu ou não entregou frames.
+    """
+    cap = abrir_camera(config, silencioso=True)
+    try:
+        if not cap.isOpened():
+            return None
+        for _ in range(aquecimento):
+            if not cap.read()[0]:
+                return None
+
+        instantes, custos, deteccoes = [], [], 0
+        img = None
+        for _ in range(frames):
+            ok, img = cap.read()
+            if not ok:
+                break
+            instantes.append(time.perf_counter())
+            if hands is not None:
+                t0 = time.perf_counter()
+                results = hands.process(cv2.cvtColor(cv2.flip(img, 1), cv2.COLOR_BGR2RGB))
+                custos.append(time.perf_counter() - t0)
+                deteccoes += bool(results.multi_hand_landmarks)
+        if len(instantes) < 2 or img is None:
+            return None
+
+        intervalo = (instantes[-1] - instantes[0]) / (len(instantes) - 1)
+        # Com a IA no mesmo loop o intervalo medido já inclui o custo dela; desconta para ter o da câmera
+        custo = sum(custos) / len(custos) if custos else 0.0
+        intervalo_camera = max(intervalo - custo, 1e-6) if custos else intervalo
+        return {
+            "config": config,
+            "mode": descrever_modo(cap),
+            "width": img.shape[1],
+            "height": img.shape[0],
+            "fps": 1.0 / intervalo_camera,
+            # Atraso típico: meio intervalo esperando o próximo frame + frames no buffer + processamento
+            "latency_ms": (intervalo_camera * (0.5 + config.get("buffer_size", 1)) + custo) * 1000,
+            "inference_ms": custo * 1000,
+            "detection": deteccoes / len(instantes) if hands is not None else None,
+        }
+    finally:
+        cap.release()
+
+def sondar_camera(base, hands=None, largura_minima=640):
+    """
+    Testa combinações de backend, formato, resolução e FPS e devolve (melhor, medidas).
+
+    Para não perder precisão do MediaPipe, descarta modos mais estreitos que
+    `largura_minima` (a mão fica pequena demais na imagem) e, se houver mão em cena
+    durante a sonda, modos que detectaram bem menos que o melhor. Entre os restantes
+    vence o de menor latência estimada.
+    """
+    medidas = []
+    for backend in backends_da_plataforma():
+        for fourcc in FOURCCS_SONDA:
+            for largura, altura in RESOLUCOES_SONDA:
+                for fps in FPS_SONDA:
+                    config = dict(base, backend=backend, fourcc=fourcc, width=largura, height=altura, fps=fps)
+                    medida = medir_modo(config, hands)
+                    if medida is None:
+                        print(f"  {backend:<12} {fourcc} {largura}x{altura}@{fps}: unavailable")
+                        continue
+                    # Modo recusado pelo driver: a câmera caiu em outro que já foi (ou será) medido
+                    if (medida["width"], medida["height"]) != (largura, altura):
+                        print(f"  {backend:<12} {fourcc} {largura}x{altura}@{fps}: got {medida['mode']}, skipped")
+                        continue
+                    deteccao = "" if medida["detection"] is None else f" | hand {medida['detection'] * 100:.0f}%"
+                    print(f"  {backend:<12} {fourcc} {largura}x{altura}@{fps}: {medida['fps']:.1f} fps real "
+                          f"| ~{medida['latency_ms']:.0f} ms | AI {medida['inference_ms']:.1f} ms{deteccao}")
+                    medidas.append(medida)
+
+    candidatos = [m for m in medidas if m["width"] >= largura_minima]
+    deteccoes = [m["detection"] for m in candidatos if m["detection"]]
+    if deteccoes:
+        melhor_deteccao = max(deteccoes)
+        candidatos = [m for m in candidatos if (m["detection"] or 0) >= melhor_deteccao - 0.1]
+    if not candidatos:
+        return None, medidas
+    return min(candidatos, key=lambda m: m["latency_ms"]), medidas
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+import threading
+
+# --- FUNÇÕES DE ARQUIVO ---
+
+def load_json_config(caminho):
+    """
+    Carrega configuração e migra automaticamente para o sistema de perfis.
+    """
+    # Estrutura padrão nova
+    padrao = {
+        "volume": 1.0, 
+        "current_profile": "Padrão",
+        "profiles": {
+            "Padrão": {"gestures": {}, "aliases": {}}
+        }
+    }
+    
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                
+                # --- MIGRAÇÃO AUTOMÁTICA ---
+                # Se o JSON tem 'gestures' na raiz, é o modelo antigo.
+                # Vamos mover esses dados para dentro de um perfil "Padrão".
+                if "profiles" not in data:
+                    print("Migrando dados antigos para perfil Padrão...")
+                    gestos_antigos = data.get("gestures", {})
+                    aliases_antigos = data.get("aliases", {})
+                    vol_antigo = data.get("volume", 1.0)
+                    
+                    data = {
+                        "volume": vol_antigo,
+                        "current_profile": "Padrão",
+                        "profiles": {
+                            "Padrão": {
+                                "gestures": gestos_antigos,
+                                "aliases": aliases_antigos
+                            }
+                        }
+                    }
+                    # Salva a versão convertida imediatamente
+                    save_json_config(caminho, data)
+                
+                return data
+        except Exception as e:
+            print(f"Erro ao ler config: {e}. Criando novo.")
+            # Guarda o arquivo ilegível ao lado, para não perder os perfis na próxima escrita
+            try:
+                os.replace(caminho, caminho + ".corrupt")
+            except OSError:
+                pass
+            return padrao
+            
+    # Se não existe arquivo, cria o padrão
+    save_json_config(caminho, padrao)
+    return padrao
+
+def save_json_config(caminho, dados):
+    """Escreve num arquivo temporário e troca pelo original (nunca deixa o JSON pela metade)."""
+    try:
+        _escrever_atomico(caminho, json.dumps(dados, indent=4))
+    except Exception as e:
+        print(f"Erro ao salvar config: {e}")
+
+def _escrever_atomico(caminho, texto):
+    temporario = caminho + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(texto)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+class GravadorConfig:
+    """
+    Salva a configuração em segundo plano.
+    Várias alterações seguidas (ex: arrastar o slider) viram uma única escrita
+    a cada `intervalo` segundos, sempre feita de forma atômica.
+    """
+    def __init__(self, caminho, intervalo=0.5):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self._pendente = None
+        self._ativo = True
+        self._cond = threading.Condition()
+        self._lock_escrita = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def agendar(self, dados):
+        """Marca a config para ser salva. Serializa já, para não ler o dict enquanto a UI o altera."""
+        texto = json.dumps(dados, indent=4)
+        with self._cond:
+            self._pendente = texto
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pendente is None and self._ativo:
+                    self._cond.wait()
+                if not self._ativo:
+                    return
+            # Espera o intervalo para juntar as próximas alterações na mesma escrita
+            time.sleep(self.intervalo)
+            self.flush()
+
+    def flush(self):
+        """Grava imediatamente o que estiver pendente."""
+        with self._lock_escrita:
+            with self._cond:
+                texto, self._pendente = self._pendente, None
+            if texto is None:
+                return
+            try:
+                _escrever_atomico(self.caminho, texto)
+            except Exception as e:
+                print(f"Erro ao salvar config: {e}")
+
+    def fechar(self):
+        """Para a thread e grava o que faltar (chamar ao fechar o app)."""
+        with self._cond:
+            self._ativo = False
+            self._cond.notify()
+        self.flush()
@@ -0,0 +1,187 @@
+import collections
+
+# --- MÁQUINA DE ESTADOS DOS GESTOS ---
+
+# Valores padrão (podem ser sobrescritos por perfil no config.json)
+PADRAO_GESTOS = {
+    "hold_time": 1.0,          # Segundos segurando o gesto até disparar
+    "vote_window": 5,          # Frames na votação por maioria
+    "dropout_tolerance": 0.25, # Segundos de leitura diferente tolerados sem zerar o timer
+    "cooldown": 0.5,           # Segundos mínimos entre dois disparos
+}
+
+class MaquinaGestos:
+    """
+    Decide quando um gesto foi segurado tempo suficiente para disparar.
+
+    A contagem de cada frame entra numa votação por maioria (janela deslizante).
+    Se o gesto votado muda por menos de `dropout_tolerance` segundos (um frame
+    mal detectado, por exemplo), o timer continua; só uma mudança sustentada
+    troca o gesto. Depois de um disparo, o próximo só acontece após o cooldown.
+
+    Não depende de câmera nem de MediaPipe: recebe (contagem, instante) e pode
+    ser alimentada com sequências gravadas.
+    """
+    def __init__(self, hold_time=1.0, vote_window=5, dropout_tolerance=0.25, cooldown=0.5):
+        self.configurar(hold_time=hold_time, vote_window=vote_window,
+                        dropout_tolerance=dropout_tolerance, cooldown=cooldown)
+        self.reiniciar()
+
+    def configurar(self, **parametros):
+        """Atualiza os parâmetros (ex: ao trocar de perfil) sem perder o estado atual."""
+        self.hold_time = parametros.get("hold_time", PADRAO_GESTOS["hold_time"])
+        self.vote_window = max(1, int(parametros.get("vote_window", PADRAO_GESTOS["vote_window"])))
+        self.dropout_tolerance = parametros.get("dropout_tolerance", PADRAO_GESTOS["dropout_tolerance"])
+        self.cooldown = parametros.get("cooldown", PADRAO_GESTOS["cooldown"])
+        votos_antigos = list(getattr(self, "_votos", []))
+        self._votos = collections.deque(votos_antigos, maxlen=self.vote_window)
+
+    def reiniciar(self):
+        self._votos = collections.deque(maxlen=self.vote_window)
+        self.gesto = None           # Gesto estável atual
+        self.inicio = 0.0           # Quando o gesto atual começou
+        self.progresso = 0.0        # 0..1 do tempo de segurar
+        self.ja_tocou = False       # Já disparou neste gesto (precisa soltar para repetir)
+        self.mudou = False          # O gesto estável mudou neste frame
+        self._divergente_desde = None
+        self._ultimo_disparo = float("-inf")
+
+    def _votar(self):
+        contagem = collections.Counter(self._votos)
+        maximo = max(contagem.values())
+        # Empate: vence o mais recente
+        for valor in reversed(self._votos):
+            if contagem[valor] == maximo:
+                return valor
+
+    def atualizar(self, leitura, t, disponiveis=None):
+        """
+        Alimenta a leitura de um frame (ex: soma de dedos) capturado no instante t.
+        `disponiveis` limita quais gestos podem disparar (ex: sons_carregados).
+        Retorna True no frame em que o gesto deve disparar.
+        """
+        self._votos.append(leitura)
+        candidato = self._votar()
+        self.mudou = False
+
+        if candidato == self.gesto:
+            self._divergente_desde = None
+        else:
+            if self._divergente_desde is None:
+                self._divergente_desde = t
+            # Troca só se a divergência durar mais que a tolerância (ou se ainda não há gesto)
+            if self.gesto is None or t - self._divergente_desde >= self.dropout_tolerance:
+                self.gesto = candidato
+                # O novo gesto conta desde que começou a divergir, não desde a confirmação
+                self.inicio = self._divergente_desde
+                self._divergente_desde = None
+                self.ja_tocou = False
+                self.mudou = True
+
+        decorrido = t - self.inicio
+        self.progresso = min(decorrido / self.hold_time, 1.0) if self.hold_time > 0 else 1.0
+
+        if self.ja_tocou or not self.gesto:
+            return False
+        if disponiveis is not None and self.gesto not in disponiveis:
+            return False
+        if decorrido >= self.hold_time and t - self._ultimo_disparo >= self.cooldown:
+            self.ja_tocou = True
+            self._ultimo_disparo = t
+            return True
+        return False
+
+# --- FUSÃO DE VÁRIAS CÂMERAS ---
+
+class FusaoVistas:
+    """
+    Junta as leituras de várias câmeras numa só: vale a vista mais confiável
+    entre as que mandaram leitura há no máximo `validade` segundos.
+    Uma vista que vê mão ganha de uma que não vê (confiança 0).
+    """
+    def __init__(self, validade=0.3):
+        self.validade = validade
+        self._vistas = {} # fonte -> (leitura, confiança, instante)
+        self.vencedora = None
+
+    def atualizar(self, fonte, leitura, confianca, t):
+        """Registra a leitura da fonte e retorna a leitura fundida."""
+        self._vistas[fonte] = (leitura, confianca, t)
+        melhor = None
+        for nome, (valor, conf, instante) in self._vistas.items():
+            if t - instante > self.validade:
+                continue
+            if melhor is None or conf > melhor[2]:
+                melhor = (nome, valor, conf)
+        self.vencedora = melhor[0]
+        return melhor[1]
+
+# --- VOCABULÁRIO DE GESTOS ---
+
+# Cada mão vira um código de 6 bits: 1 bit de presença + 5 dedos (dedão = bit 0 ... mindinho = bit 4).
+# O índice do frame junta a mão esquerda (bits 0-5) e a direita (bits 6-11): 4096 combinações.
+BITS_MAO = 6
+MAO_PRESENTE = 1 << 5
+TOTAL_INDICES = 1 << (2 * BITS_MAO)
+LADOS = "LR" # Esquerda, direita; "H" no config vale para qualquer uma das mãos
+
+def chave_gesto(texto):
+    """
+    Normaliza uma chave de gesto do config.json:
+      "3"             -> 3 (soma dos dedos das duas mãos, como sempre)
+      "L01100"        -> só a mão esquerda, com indicador e médio levantados
+      "R11111"        -> só a mão direita, aberta
+      "H00000"        -> uma mão só (qualquer uma), fechada
+      "L01000+R01000" -> as duas mãos, cada uma com o seu padrão
+    Os dígitos vão do dedão ao mindinho. Levanta ValueError se a chave for inválida.
+    """
+    texto = str(texto).strip().upper().replace(" ", "")
+    if texto.isdigit():
+        return int(texto)
+    partes = texto.split("+")
+    if len(partes) > 2:
+        raise ValueError(f"invalid gesture '{texto}'")
+    maos = {}
+    for parte in partes:
+        lado, dedos = parte[:1], parte[1:]
+        if lado not in "LRH" or len(dedos) != 5 or set(dedos) - {"0", "1"} or lado in maos:
+            raise ValueError(f"invalid gesture '{texto}'")
+        maos[lado] = dedos
+    if len(maos) == 2 and set(maos) != set(LADOS):
+        raise ValueError(f"invalid gesture '{texto}' (two hands must be L and R)")
+    return "+".join(lado + maos[lado] for lado in "LRH" if lado in maos)
+
+def _codigo_dedos(dedos):
+    return MAO_PRESENTE | sum(1 << i for i, d in enumerate(dedos) if d == "1")
+
+# Soma dos dedos de cada índice (os bits de presença não contam), calculada uma vez
+CONTAGENS = [bin(i & ~(MAO_PRESENTE | MAO_PRESENTE << BITS_MAO)).count("1") for i in range(TOTAL_INDICES)]
+
+class TabelaGestos:
+    """
+    Tabela índice do frame -> gesto, montada na recarga do perfil para a
+    classificação de cada frame ser um único acesso à lista.
+
+    Toda posição começa com a soma dos dedos (os gestos numéricos de sempre);
+    as poses do perfil sobrescrevem as posições delas, da menos para a mais
+    específica: "H" (qualquer mão), depois "L"/"R", depois as duas mãos.
+    """
+    def __init__(self, chaves=()):
+        self.contagens = CONTAGENS
+        self.leituras = list(CONTAGENS)
+        poses = [c for c in chaves if isinstance(c, str)]
+        # Menos específica primeiro: as mais específicas sobrescrevem
+        for chave in sorted(poses, key=lambda c: ("+" in c, not c.startswith("H"))):
+            for indice in self._indices(chave):
+                self.leituras[indice] = chave
+        self.poses = len(poses)
+
+    @staticmethod
+    def _indices(chave):
+        maos = dict((parte[0], _codigo_dedos(parte[1:])) for parte in chave.split("+"))
+        if "H" in maos:
+            return [maos["H"], maos["H"] << BITS_MAO]
+        return [maos.get("L", 0) | maos.get("R", 0) << BITS_MAO]
+
+    def __getitem__(self, indice):
+        return self.leituras[indice]
@@ -1,6 +1,6 @@
 import cv2
 import math
-import json
+import numpy as np
 import os
 
 # --- FUNÇÕES DE MATEMÁTICA/VISUAL ---
@@ -29,110 +29,292 @@ def count_fingers(hand_landmarks):
             contador += 1
     return contador
 
-def draw_modern_overlay(img, progresso, texto_principal, texto_secundario=""):
+# --- LEITURA DAS MÃOS (caminho quente, por frame) ---
+# Para 1-2 mãos o NumPy perde para o Python puro (overhead fixo de cada chamada)
+# e converter os 21 landmarks custa mais que a contagem inteira. Por isso a
+# classificação lê direto dos objetos do MediaPipe só os 12 landmarks usados,
+# e o array completo só é montado quando alguém precisa dele (desenho, gravação).
+
+# Pares (ponta, articulação) dos 4 dedos, com o bit de cada um no código da mão
+DEDOS_BITS = ((8, 6, 2), (12, 10, 4), (16, 14, 8), (20, 18, 16))
+
+def _ler_mao(lm):
+    """(código dos dedos, pulso (x, y)) de uma lista de 21 landmarks."""
+    pulso = lm[0]
+    px, py = pulso.x, pulso.y
+    codigo = 0
+
+    # Dedão
+    ponta_x = lm[4].x
+    if abs(ponta_x - lm[3].x) > 0.05 and abs(ponta_x - lm[17].x) > 0.2:
+        codigo = 1
+
+    # Outros 4 dedos: ponta mais longe do pulso que a articulação (distância ao quadrado basta)
+    for ponta, art, bit in DEDOS_BITS:
+        p_obj, a_obj = lm[ponta], lm[art]
+        dxp, dyp = p_obj.x - px, p_obj.y - py
+        dxa, dya = a_obj.x - px, a_obj.y - py
+        if dxp * dxp + dyp * dyp > dxa * dxa + dya * dya:
+            codigo |= bit
+    return codigo, (px, py)
+
+def ler_maos(multi_hand_landmarks):
+    """(códigos dos dedos, pulsos (x, y)) de cada mão, direto dos objetos do MediaPipe."""
+    codigos, pulsos = [], []
+    for mao in multi_hand_landmarks or ():
+        codigo, pulso = _ler_mao(mao.landmark)
+        codigos.append(codigo)
+        pulsos.append(pulso)
+    return codigos, pulsos
+
+def landmarks_para_array(multi_hand_landmarks):
+    """Converte as mãos do MediaPipe em um array (mãos, 21, 3) float32 (para desenho e gravação)."""
+    if not multi_hand_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32)
+    return np.array([[(lm.x, lm.y, lm.z) for lm in mao.landmark] for mao in multi_hand_landmarks],
+                    dtype=np.float32)
+
+def maos_do_frame(frame):
+    """Array (mãos, 21, 3) do frame, convertido só na primeira vez que alguém pede."""
+    maos = frame.get("maos")
+    if maos is None:
+        maos = frame["maos"] = landmarks_para_array(frame.pop("landmarks", None))
+    return maos
+
+# --- VERSÃO EM LOTE (gravações: milhares de frames de uma vez) ---
+
+# Landmarks usados na contagem vetorizada, buscados numa única indexação:
+# pulso, 4 pontas, 4 articulações e (ponta, articulação, base do mindinho) do dedão
+INDICES_DEDOS = [0, 8, 12, 16, 20, 6, 10, 14, 18, 4, 3, 17]
+
+# Peso de cada dedo no código da mão (dedão = bit 0)
+PESOS_DEDOS = np.array([1, 2, 4, 8, 16], dtype=np.int64)
+
+def dedos_levantados(maos):
     """
-    Desenha uma interface HUD moderna transparente sobre a imagem.
+    Versão vetorizada do count_fingers para muitas mãos de uma vez.
+    Retorna um array bool (mãos, 5): dedão, indicador, médio, anelar, mindinho.
+    """
+    pontos = maos[:, INDICES_DEDOS, :2]
+
+    # Outros 4 dedos: ponta mais longe do pulso que a articulação (distância ao quadrado basta)
+    relativos = pontos[:, 1:9] - pontos[:, :1]
+    dist2 = np.einsum('mij,mij->mi', relativos, relativos)
+    outros = dist2[:, :4] > dist2[:, 4:]
+
+    # Dedão: mesma regra horizontal do count_fingers
+    x = pontos[:, 9:, 0]
+    dedao = (np.abs(x[:, 0] - x[:, 1]) > 0.05) & (np.abs(x[:, 0] - x[:, 2]) > 0.2)
+
+    return np.column_stack([dedao, outros])
+
+def codigos_em_lote(maos):
+    """Códigos dos dedos de um array (..., 21, 3) inteiro de uma vez (mesmo formato do _ler_mao)."""
+    forma = maos.shape[:-2]
+    return (dedos_levantados(maos.reshape(-1, 21, 3)) @ PESOS_DEDOS).reshape(forma)
+
+# --- CLASSIFICAÇÃO ---
+
+def scores_maos(results):
+    """Confiança (handedness do MediaPipe) de cada mão."""
+    if not results or not results.multi_handedness:
+        return []
+    return [h.classification[0].score for h in results.multi_handedness]
+
+def lados_maos(results):
+    """Lado de cada mão (handedness do MediaPipe, imagem espelhada): 0 esquerda, 1 direita."""
+    if not results or not results.multi_handedness:
+        return []
+    return [int(h.classification[0].label == "Right") for h in results.multi_handedness]
+
+def maos_validas(pulsos, limite=0.1):
+    """
+    Marca como inválidas as mãos que são cópia de uma anterior (pulsos a menos
+    de 10% da tela na horizontal e na vertical).
+    """
+    validas = [True] * len(pulsos)
+    for j in range(1, len(pulsos)):
+        xj, yj = pulsos[j]
+        for i in range(j):
+            xi, yi = pulsos[i]
+            if abs(xi - xj) < limite and abs(yi - yj) < limite:
+                validas[j] = False
+                break
+    return validas
+
+def indice_gesto(codigos, pulsos, lados, scores=None):
+    """
+    Índice do frame na TabelaGestos (gestos.py): código de 6 bits (presença +
+    dedos) da mão esquerda nos bits 0-5 e da direita nos bits 6-11. Ignora
+    duplicatas. Se as duas mãos vierem com o mesmo lado, a de menor confiança
+    fica com o outro. Retorna (índice, lista das mãos válidas).
+    """
+    validas = maos_validas(pulsos)
+    if len(lados) < len(codigos): # Sem handedness (ex: gravação antiga): a primeira mão vale como direita
+        lados = [1] + [0] * (len(codigos) - 1)
+    usadas = [i for i, valida in enumerate(validas) if valida][:2]
+    if len(usadas) == 2 and lados[usadas[0]] == lados[usadas[1]]:
+        a, b = usadas
+        confiante = scores is None or len(scores) <= b or scores[a] >= scores[b]
+        lado_a = lados[a] if confiante else 1 - lados[a]
+        return (codigos[a] | 32) << (6 * lado_a) | (codigos[b] | 32) << (6 * (1 - lado_a)), validas
+    indice = 0
+    for i in usadas:
+        indice |= (codigos[i] | 32) << (6 * lados[i])
+    return indice, validas
+
+def somar_dedos(codigos, validas):
+    """Soma dos dedos das mãos válidas."""
+    return sum(bin(codigo).count("1") for codigo, valida in zip(codigos, validas) if valida)
+
+def confianca_maos(scores, validas):
+    """Confiança média das mãos válidas; 0 se não há mão."""
+    validos = [score for score, valida in zip(scores, validas) if valida]
+    return sum(validos) / len(validos) if validos else 0.0
+
+# Ligações entre os 21 landmarks da mão (as mesmas do mp.solutions.hands.HAND_CONNECTIONS)
+CONEXOES_MAO = [
+    (0, 1), (1, 2), (2, 3), (3, 4),         # Dedão
+    (0, 5), (5, 6), (6, 7), (7, 8),         # Indicador
+    (5, 9), (9, 10), (10, 11), (11, 12),    # Médio
+    (9, 13), (13, 14), (14, 15), (15, 16),  # Anelar
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20), # Mindinho e palma
+]
+
+def desenhar_maos(img, maos, validas):
     """
+    Desenha o esqueleto das mãos válidas a partir do array (mãos, 21, 3),
+    no estilo do mp_draw.draw_landmarks (não precisa dos objetos do MediaPipe).
+    """
+    h, w = img.shape[:2]
+    for mao, valida in zip(maos, validas):
+        if not valida:
+            continue
+        pontos = (mao[:, :2] * (w, h)).astype(np.int32)
+        for a, b in CONEXOES_MAO:
+            cv2.line(img, tuple(pontos[a]), tuple(pontos[b]), (224, 224, 224), 2)
+        for ponto in pontos:
+            cv2.circle(img, tuple(ponto), 2, (0, 0, 255), 2)
+
+# --- HUD ---
+
+FONTE_HUD = cv2.FONT_HERSHEY_DUPLEX # Fonte mais limpa que a Simplex
+ALTURA_TOPO = 50
+ALTURA_RODAPE = 80
+
+def _rasterizar_texto(texto, origem, escala, cor):
+    """Desenha o texto uma vez numa máscara pequena (com anti-aliasing) para reaproveitar."""
+    (larg, alt), base = cv2.getTextSize(texto, FONTE_HUD, escala, 1)
+    pad = 2
+    mascara = np.zeros((alt + base + 2 * pad, larg + 2 * pad), dtype=np.uint8)
+    cv2.putText(mascara, texto, (pad, alt + pad), FONTE_HUD, escala, 255, 1, cv2.LINE_AA)
+    return mascara, cor, origem[0] - pad, origem[1] - alt - pad
+
+def _rasterizar_circulo(centro, raio, espessura, cor):
+    lado = 2 * (raio + espessura) + 1
+    mascara = np.zeros((lado, lado), dtype=np.uint8)
+    meio = lado // 2
+    cv2.circle(mascara, (meio, meio), raio, 255, espessura, cv2.LINE_AA)
+    return mascara, cor, centro[0] - meio, centro[1] - meio
+
+def _aplicar_camada(img, camada):
+    """Mistura uma camada cacheada sobre a imagem, só dentro do retângulo dela."""
+    mascara, cor, x, y = camada
     h_img, w_img, _ = img.shape
-    
-    # 1. Criar uma cópia para fazer o efeito de vidro (transparência)
-    overlay = img.copy()
-    
-    # --- Configuração do Painel Inferior ---
-    # Desenhamos um retângulo preto na parte de baixo
-    cv2.rectangle(overlay, (0, h_img - 80), (w_img, h_img), (0, 0, 0), -1)
-    
-    # --- Painel Superior (Status) ---
-    # Desenhamos um painel menor no topo para mensagens
-    cv2.rectangle(overlay, (0, 0), (w_img, 50), (10, 10, 10), -1)
-
-    # 2. Aplicar transparência (Alpha Blending)
-    # alpha 0.4 significa 40% de opacidade do retângulo preto
-    alpha = 0.6
-    cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0, img)
-
-    # --- Barra de Progresso (Glow Effect) ---
-    # Barra de fundo (cinza)
-    bar_x, bar_y, bar_w, bar_h = 50, h_img - 40, w_img - 100, 10
-    cv2.rectangle(img, (bar_x, bar_y), (bar_x + bar_w, bar_y + bar_h), (100, 100, 100), -1)
-    
-    # Cor dinâmica (Vermelho -> Amarelo -> Verde Neon)
-    if progresso < 0.3: cor = (50, 50, 255)    # Vermelho
-    elif progresso < 0.8: cor = (0, 255, 255)  # Amarelo
-    else: cor = (50, 255, 50)                  # Verde Neon
-
-    # Barra preenchida
-    fill_w = int(bar_w * progresso)
-    if fill_w > 0:
-        cv2.rectangle(img, (bar_x, bar_y), (bar_x + fill_w, bar_y + bar_h), cor, -1)
-
-    # --- Textos (Clean Typography) ---
-    # Texto Central (Ação)
-    fonte = cv2.FONT_HERSHEY_DUPLEX # Fonte mais limpa que a Simplex
-    cv2.putText(img, texto_principal, (bar_x, bar_y - 15), fonte, 0.8, (255, 255, 255), 1, cv2.LINE_AA)
-    
-    # Texto Secundário (Status no Topo)
-    if texto_secundario:
-         cv2.putText(img, texto_secundario, (20, 35), fonte, 0.7, (200, 200, 200), 1, cv2.LINE_AA)
-         
-    # Contador de dedos (Canto direito inferior, estilo "Score")
-    # Vamos desenhar um circulo visual
-    cv2.circle(img, (w_img - 50, h_img - 40), 30, (255, 255, 255), 2, cv2.LINE_AA)
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + mascara.shape[1], w_img), min(y + mascara.shape[0], h_img)
+    if x1 <= x0 or y1 <= y0:
+        return
+    roi = img[y0:y1, x0:x1]
+    alpha = mascara[y0 - y:y1 - y, x0 - x:x1 - x, None] * np.float32(1 / 255)
+    roi[:] = roi + (np.float32(cor) - roi) * alpha
 
-# --- FUNÇÕES DE ARQUIVO (NOVO) ---
+class HudOverlay:
+    """
+    HUD moderno com cache.
+    As faixas de vidro são misturadas só nas ROIs do topo e do rodapé (in-place),
+    o círculo do placar é rasterizado uma vez por resolução e os textos só são
+    redesenhados quando mudam.
+    """
+    def __init__(self, alpha=0.6):
+        self.alpha = alpha
+        self._resolucao = None
+        self._circulo = None
+        self._textos = {}
+
+    def _reconstruir(self, h_img, w_img):
+        self._resolucao = (h_img, w_img)
+        self._circulo = _rasterizar_circulo((w_img - 50, h_img - 40), 30, 2, (255, 255, 255))
+        self._textos.clear()
+
+    def _camada_texto(self, chave, texto, origem, escala, cor):
+        atual = self._textos.get(chave)
+        if atual is None or atual[0] != texto:
+            atual = (texto, _rasterizar_texto(texto, origem, escala, cor))
+            self._textos[chave] = atual
+        return atual[1]
 
-def load_json_config(caminho):
+    def desenhar(self, img, progresso, texto_principal, texto_secundario=""):
+        h_img, w_img, _ = img.shape
+        if self._resolucao != (h_img, w_img):
+            self._reconstruir(h_img, w_img)
+
+        # --- Painéis de vidro (Alpha Blending só nas faixas) ---
+        # Retângulo preto embaixo e cinza bem escuro (10) no topo, com 60% de opacidade:
+        # pixel * (1 - alpha) + cor * alpha, direto nas views da imagem
+        manter = 1 - self.alpha
+        topo = img[:ALTURA_TOPO + 1] # cv2.rectangle incluía a linha 50
+        cv2.convertScaleAbs(topo, topo, manter, 10 * self.alpha)
+        rodape = img[h_img - ALTURA_RODAPE:]
+        cv2.convertScaleAbs(rodape, rodape, manter, 0)
+
+        # --- Barra de Progresso (Glow Effect) ---
+        # Barra de fundo (cinza)
+        bar_x, bar_y, bar_w, bar_h = 50, h_img - 40, w_img - 100, 10
+        cv2.rectangle(img, (bar_x, bar_y), (bar_x + bar_w, bar_y + bar_h), (100, 100, 100), -1)
+
+        # Cor dinâmica (Vermelho -> Amarelo -> Verde Neon)
+        if progresso < 0.3: cor = (50, 50, 255)    # Vermelho
+        elif progresso < 0.8: cor = (0, 255, 255)  # Amarelo
+        else: cor = (50, 255, 50)                  # Verde Neon
+
+        # Barra preenchida
+        fill_w = int(bar_w * progresso)
+        if fill_w > 0:
+            cv2.rectangle(img, (bar_x, bar_y), (bar_x + fill_w, bar_y + bar_h), cor, -1)
+
+        # --- Textos (Clean Typography, rasterizados só quando mudam) ---
+        # Texto Central (Ação)
+        _aplicar_camada(img, self._camada_texto("principal", texto_principal,
+                                                (bar_x, bar_y - 15), 0.8, (255, 255, 255)))
+
+        # Texto Secundário (Status no Topo)
+        if texto_secundario:
+            _aplicar_camada(img, self._camada_texto("secundario", texto_secundario,
+                                                    (20, 35), 0.7, (200, 200, 200)))
+
+        # Contador de dedos (Canto direito inferior, estilo "Score")
+        _aplicar_camada(img, self._circulo)
+
+_hud = HudOverlay()
+
+def draw_modern_overlay(img, progresso, texto_principal, texto_secundario=""):
     """
-    Carrega configuração e migra automaticamente para o sistema de perfis.
+    Desenha uma interface HUD moderna transparente sobre a imagem.
     """
-    # Estrutura padrão nova
-    padrao = {
-        "volume": 1.0, 
-        "current_profile": "Padrão",
-        "profiles": {
-            "Padrão": {"gestures": {}, "aliases": {}}
-        }
-    }
-    
-    if os.path.exists(caminho):
-        try:
-            with open(caminho, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # --- MIGRAÇÃO AUTOMÁTICA ---
-                # Se o JSON tem 'gestures' na raiz, é o modelo antigo.
-                # Vamos mover esses dados para dentro de um perfil "Padrão".
-                if "profiles" not in data:
-                    print("Migrando dados antigos para perfil Padrão...")
-                    gestos_antigos = data.get("gestures", {})
-                    aliases_antigos = data.get("aliases", {})
-                    vol_antigo = data.get("volume", 1.0)
-                    
-                    data = {
-                        "volume": vol_antigo,
-                        "current_profile": "Padrão",
-                        "profiles": {
-                            "Padrão": {
-                                "gestures": gestos_antigos,
-                                "aliases": aliases_antigos
-                            }
-                        }
-                    }
-                    # Salva a versão convertida imediatamente
-                    save_json_config(caminho, data)
-                
-                return data
-        except Exception as e:
-            print(f"Erro ao ler config: {e}. Criando novo.")
-            return padrao
-            
-    # Se não existe arquivo, cria o padrão
-    save_json_config(caminho, padrao)
-    return padrao
-
-def save_json_config(caminho, dados):
+    _hud.desenhar(img, progresso, texto_principal, texto_secundario)
+
+# --- FUNÇÕES DE ARQUIVO (NOVO) ---
+
+def salvar_jpeg_atomico(caminho, img, qualidade=80):
+    """Salva um JPEG sem que outro programa (ex: OBS) leia o arquivo pela metade."""
+    ok, dados = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+    if not ok:
+        return
+    temporario = caminho + ".tmp"
     try:
-        with open(caminho, 'w') as f:
-            json.dump(dados, f, indent=4)
+        with open(temporario, 'wb') as f:
+            f.write(dados.tobytes())
+        os.replace(temporario, caminho)
     except Exception as e:
-        print(f"Erro ao salvar config: {e}")
\ No newline at end of file
+        print(f"Erro ao salvar preview: {e}")
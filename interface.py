@@ -1,6 +1,9 @@
 import customtkinter as ctk
 from tkinter import filedialog
 import os
+import queue
+
+from gestos import chave_gesto
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("green")
@@ -15,17 +18,43 @@ BTN_MAIN_HEIGHT = 40
 # Altura estimada de cada linha do menu (botão + padding)
 MENU_ROW_HEIGHT = 42 
 
+# Lista virtual: só existem widgets para as linhas que cabem na tela (perfis podem ter centenas de gestos)
+ALTURA_LINHA_SLOT = 51 # Card (45px) + padding vertical (3px em cima e embaixo)
+GESTOS_NUMERICOS = range(1, 11)
+
+# Cor do número do slot conforme o estado do carregamento do som
+CORES_ESTADO_SLOT = {
+    "loading": "#F39C12",
+    "ready": "#2CC985",
+    "error": "#E74C3C",
+    "missing": "#7F8C8D",
+}
+COR_SLOT_VAZIO = "#444444"
+
 def truncate_text(text, max_length=35):
     if len(text) > max_length: return text[:max_length-3] + "..."
     return text
 
 class SoundpadInterface:
-    def __init__(self, root, config_inicial, callback_iniciar_ia, callback_atualizar_config):
+    def __init__(self, root, config_inicial, callback_iniciar_ia, callback_atualizar_config,
+                 callback_volume=None):
         self.root = root
         self.config = config_inicial
         self.callback_iniciar_ia = callback_iniciar_ia
         self.callback_atualizar_config = callback_atualizar_config
-        self.labels_caminhos = {} 
+        # Volume tem caminho próprio (mais leve); sem ele, cai no callback geral
+        self.callback_volume = callback_volume or callback_atualizar_config
+        self.linhas = [] # Pool de widgets das linhas visíveis (cresce com a altura da janela)
+        self.linha_da_chave = {} # gesto -> índice da linha que o mostra agora
+        self.ordem_gestos = [] # Todos os gestos do perfil ativo, na ordem da lista
+        self.chaves_config = {} # gesto -> como está escrito no config.json
+        self.primeira_linha = 0 # Índice (em ordem_gestos) do primeiro gesto visível
+        self.itens_menu = {} # perfil -> (frame da linha, botão do nome)
+        # Estado de cada slot, vindo do backend; "missing" (arquivo sumiu) sai do vigia de
+        # arquivos do backend, então o redesenho nunca confere o disco
+        self.estados_slots = {}
+        self.memoria_slots = {} # numero -> (bytes na RAM, streaming?)
+        self.fila_notificacoes = queue.SimpleQueue() # Avisos vindos de outras threads
         self.rodando = False
         self.menu_aberto = False 
 
@@ -50,12 +79,32 @@ class SoundpadInterface:
         self.dropdown_frame = ctk.CTkScrollableFrame(root, corner_radius=10, 
                                                      fg_color="#222222", border_width=1, border_color="#444444")
         
-        # --- LISTA PRINCIPAL ---
-        self.main_frame = ctk.CTkScrollableFrame(root, corner_radius=10, fg_color="transparent")
+        self.btn_add_perfil = ctk.CTkButton(self.dropdown_frame, text="+ Criar Novo Perfil", 
+                                            fg_color="transparent", border_width=1, border_color="#555",
+                                            hover_color="#333333", height=30,
+                                            command=self.criar_novo_perfil)
+        
+        # --- LISTA PRINCIPAL (virtual: as linhas são reaproveitadas ao rolar) ---
+        self.main_frame = ctk.CTkFrame(root, corner_radius=10, fg_color="transparent")
         self.main_frame.pack(pady=5, padx=10, fill="both", expand=True)
-
-        for i in range(1, 11):
-            self.criar_slot_vertical_layout(self.main_frame, i)
+        self.scrollbar = ctk.CTkScrollbar(self.main_frame, command=self.rolar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.lista_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        self.lista_frame.pack(side="left", fill="both", expand=True)
+        self.lista_frame.pack_propagate(False) # Linhas que não cabem ficam cortadas, não esticam a janela
+        self.lista_frame.bind("<Configure>", self.ao_redimensionar_lista)
+        self.root.bind_all("<MouseWheel>", self.ao_rolar_mouse, add="+")
+        self.root.bind_all("<Button-4>", self.ao_rolar_mouse, add="+")
+        self.root.bind_all("<Button-5>", self.ao_rolar_mouse, add="+")
+
+        # Criação de gestos por pose (mão + dedos)
+        nav_frame = ctk.CTkFrame(root, fg_color="transparent")
+        nav_frame.pack(fill="x", padx=15)
+        self.lbl_total = ctk.CTkLabel(nav_frame, text="", font=FONT_SMALL, text_color="gray")
+        self.lbl_total.pack(side="left")
+        ctk.CTkButton(nav_frame, text="+ Novo Gesto", fg_color="transparent", border_width=1,
+                      border_color="#555", hover_color="#333333", height=BTN_HEIGHT,
+                      command=self.adicionar_gesto).pack(side="right")
 
         # --- FOOTER ---
         self.footer_frame = ctk.CTkFrame(root, fg_color=("#2b2b2b", "#2b2b2b"), corner_radius=15)
@@ -75,8 +124,9 @@ class SoundpadInterface:
                                         fg_color="#2CC985", hover_color="#229A65")
         self.btn_action.pack(fill="x", padx=10, pady=(5, 15))
 
-        self.main_frame.bind("<Button-1>", lambda e: self.fechar_menu())
+        self.lista_frame.bind("<Button-1>", lambda e: self.fechar_menu())
         self.refresh_ui_slots()
+        self.processar_notificacoes()
 
     # --- LÓGICA DE PERFIS ---
 
@@ -95,26 +145,33 @@ class SoundpadInterface:
         self.menu_aberto = False
 
     def abrir_menu(self):
-        # 1. Remove visualmente o menu antes de recalcular (Isso reseta a geometria)
-        self.dropdown_frame.place_forget()
-        self.dropdown_frame.update() # Força a atualização da tela
-
-        # 2. Limpa os widgets internos
-        for widget in self.dropdown_frame.winfo_children():
-            widget.destroy()
-
-        perfis = self.config.get("profiles", {})
-        
-        # 3. Recria os itens
-        for nome_perfil in perfis:
-            self.criar_item_menu_customizado(nome_perfil)
-
-        # 4. Adiciona o botão de criar
-        btn_add = ctk.CTkButton(self.dropdown_frame, text="+ Criar Novo Perfil", 
-                                fg_color="transparent", border_width=1, border_color="#555",
-                                hover_color="#333333", height=30,
-                                command=self.criar_novo_perfil)
-        btn_add.pack(fill="x", pady=5, padx=5)
+        """
+        Mostra o menu reaproveitando as linhas já criadas: só perfis novos ou
+        apagados mexem em widgets, e só a cor do perfil ativo é atualizada.
+        """
+        perfis = list(self.config.get("profiles", {}))
+
+        for nome in [n for n in self.itens_menu if n not in perfis]:
+            self.itens_menu.pop(nome)[0].destroy()
+        novos = [nome for nome in perfis if nome not in self.itens_menu]
+        for nome in novos:
+            self.itens_menu[nome] = self.criar_item_menu_customizado(nome)
+
+        # Reempacota só se a ordem mudou (perfil criado, apagado ou renomeado)
+        if novos or list(self.itens_menu) != perfis:
+            self.itens_menu = {nome: self.itens_menu[nome] for nome in perfis}
+            for row, _ in self.itens_menu.values():
+                row.pack_forget()
+            self.btn_add_perfil.pack_forget()
+            for row, _ in self.itens_menu.values():
+                row.pack(fill="x", pady=2)
+            self.btn_add_perfil.pack(fill="x", pady=5, padx=5)
+
+        atual = self.get_perfil_atual()
+        for nome, (_, btn_nome) in self.itens_menu.items():
+            cor_txt = "#2CC985" if nome == atual else "white"
+            if btn_nome.cget("text_color") != cor_txt:
+                btn_nome.configure(text_color=cor_txt)
 
         # --- CÁLCULO MANUAL (Ajustado para ficar justo) ---
         qtd_perfis = len(perfis)
@@ -129,23 +186,19 @@ class SoundpadInterface:
         # Limites: Mínimo 50px, Máximo 220px (Scroll ativa se passar de 220)
         altura_final = max(50, min(altura_calculada, 220))
 
-        # 5. Aplica a altura e reposiciona
+        # Aplica a altura e reposiciona (sem update() síncrono: o Tk redesenha no próximo ciclo)
         self.dropdown_frame.configure(height=altura_final)
         self.dropdown_frame.place(x=20, y=90, relwidth=0.9) 
         
         self.dropdown_frame.lift()
-        self.btn_perfil.configure(text=f"Perfil: {self.get_perfil_atual()} ▲")
+        self.btn_perfil.configure(text=f"Perfil: {atual} ▲")
         self.menu_aberto = True
         
     def criar_item_menu_customizado(self, nome_perfil):
         row = ctk.CTkFrame(self.dropdown_frame, fg_color="transparent", height=35)
-        row.pack(fill="x", pady=2)
 
-        ativo = (nome_perfil == self.get_perfil_atual())
-        cor_txt = "#2CC985" if ativo else "white"
-        
         btn_nome = ctk.CTkButton(row, text=nome_perfil, fg_color="transparent", 
-                                 anchor="w", text_color=cor_txt, hover_color="#333333",
+                                 anchor="w", text_color="white", hover_color="#333333",
                                  command=lambda p=nome_perfil: self.selecionar_perfil(p))
         btn_nome.pack(side="left", fill="x", expand=True)
 
@@ -160,11 +213,22 @@ class SoundpadInterface:
                                     text_color="#E74C3C", font=FONT_ICON, hover_color="#444444",
                                     command=lambda p=nome_perfil: self.apagar_perfil(p))
             btn_del.pack(side="right")
+        return row, btn_nome
 
     # --- AÇÕES DO MENU ---
 
     def selecionar_perfil(self, nome):
         self.config["current_profile"] = nome
+        self.primeira_linha = 0
+        # Os números dos gestos se repetem entre perfis: o estado e a memória do
+        # perfil anterior (e avisos dele ainda na fila) não valem para as linhas novas
+        self.estados_slots.clear()
+        self.memoria_slots.clear()
+        while True:
+            try:
+                self.fila_notificacoes.get_nowait()
+            except queue.Empty:
+                break
         self.fechar_menu()
         self.refresh_ui_slots()
         self.callback_atualizar_config()
@@ -219,56 +283,219 @@ class SoundpadInterface:
             self.config["current_profile"] = "Padrão"
         return self.config["profiles"][nome]
     
-    def criar_slot_vertical_layout(self, parent, numero_gesto):
+    def criar_slot_vertical_layout(self, parent):
+        """Cria mais uma linha no pool; o gesto que ela mostra muda conforme a rolagem."""
         card = ctk.CTkFrame(parent, corner_radius=8, fg_color=("#3a3a3a", "#333333"), height=45)
-        card.pack(pady=3, fill="x", anchor="n")
+        linha = {"card": card, "chave": None, "aplicado": {}}
         
-        lbl_num = ctk.CTkLabel(card, text=str(numero_gesto), width=24, height=24, 
+        lbl_num = ctk.CTkLabel(card, text="", width=24, height=24, 
                                fg_color="#444444", corner_radius=12, font=("Arial", 12, "bold"))
         lbl_num.pack(side="left", padx=(8, 5), pady=8)
+        linha["numero"] = lbl_num
 
         lbl_arquivo = ctk.CTkLabel(card, text="...", font=FONT_NORMAL, anchor="w")
         lbl_arquivo.pack(side="left", fill="x", expand=True, padx=5)
-        self.labels_caminhos[numero_gesto] = lbl_arquivo
+        linha["caminho"] = lbl_arquivo
+
+        lbl_memoria = ctk.CTkLabel(card, text="", font=FONT_SMALL, text_color="gray", width=50, anchor="e")
+        lbl_memoria.pack(side="left", padx=(0, 2))
+        linha["memoria"] = lbl_memoria
 
         btn_edit = ctk.CTkButton(card, text="✏️", width=BTN_HEIGHT, fg_color="transparent", font=FONT_ICON, text_color="#E67E22", hover_color="#444444",
-                                   command=lambda: self.renomear_som(numero_gesto))
+                                   command=lambda: self.renomear_som(linha["chave"]))
         btn_edit.pack(side="right")
         
         btn_limpar = ctk.CTkButton(card, text="🗑️", width=BTN_HEIGHT, fg_color="transparent", font=FONT_ICON, text_color="#E74C3C", hover_color="#444444",
-                                   command=lambda: self.limpar_slot(numero_gesto))
+                                   command=lambda: self.limpar_slot(linha["chave"]))
         btn_limpar.pack(side="right")
 
         btn_pasta = ctk.CTkButton(card, text="📂", width=BTN_HEIGHT, fg_color="transparent", font=FONT_ICON, text_color="#3498DB", hover_color="#444444",
-                                  command=lambda: self.selecionar_arquivo(numero_gesto))
+                                  command=lambda: self.selecionar_arquivo(linha["chave"]))
         btn_pasta.pack(side="right", padx=(5, 0))
+        self.linhas.append(linha)
+
+    # --- GESTOS DO PERFIL ---
+
+    def chaves_perfil(self):
+        """
+        {gesto: chave no config} do perfil ativo: os números de 1 a 10 sempre,
+        depois as poses ("L01100"...) que o perfil tiver.
+        """
+        chaves = {numero: str(numero) for numero in GESTOS_NUMERICOS}
+        poses = {}
+        for texto in self.get_dados_perfil_ativo().get("gestures", {}):
+            try:
+                chave = chave_gesto(texto)
+            except ValueError:
+                continue
+            (chaves if isinstance(chave, int) else poses)[chave] = texto
+        for chave in sorted(poses):
+            chaves[chave] = poses[chave]
+        return chaves
+
+    def chave_config(self, chave):
+        """Como o gesto está escrito no config.json (pode não estar na forma normalizada)."""
+        return self.chaves_config.get(chave, str(chave))
+
+    def adicionar_gesto(self):
+        dialog = ctk.CTkInputDialog(text="Gesto (dedão..mindinho, ex: L01100, R11111, L01000+R01000):",
+                                    title="Novo Gesto")
+        texto = dialog.get_input()
+        if not texto:
+            return
+        try:
+            chave = chave_gesto(texto)
+        except ValueError as e:
+            print(f"[ERRO] {e}")
+            return
+        # Pede o arquivo e rola até o gesto
+        self.selecionar_arquivo(chave)
+        if chave in self.chaves_config:
+            self.mostrar_gesto(chave)
+
+    # --- LISTA VIRTUAL ---
+
+    def linhas_visiveis(self):
+        return max(1, self.lista_frame.winfo_height() // ALTURA_LINHA_SLOT)
+
+    def ao_redimensionar_lista(self, evento):
+        # O pool só cresce: uma linha a mais que o necessário para a última aparecer cortada
+        necessarias = evento.height // ALTURA_LINHA_SLOT + 1
+        while len(self.linhas) < necessarias:
+            self.criar_slot_vertical_layout(self.lista_frame)
+        self.desenhar_lista()
+
+    def rolar(self, acao, quantidade, unidade=None):
+        """Comando da scrollbar: ("moveto", fração) ou ("scroll", n, "units"/"pages")."""
+        if acao == "moveto":
+            self.primeira_linha = round(float(quantidade) * len(self.ordem_gestos))
+        else:
+            passo = self.linhas_visiveis() if unidade == "pages" else 1
+            self.primeira_linha += int(quantidade) * passo
+        self.desenhar_lista()
+
+    def ao_rolar_mouse(self, evento):
+        # bind_all: só rola se o ponteiro estiver sobre as linhas (a scrollbar rola sozinha)
+        try:
+            widget = self.root.winfo_containing(evento.x_root, evento.y_root)
+        except KeyError: # Popups internos do Tk não têm widget Python
+            return
+        if widget is None or not str(widget).startswith(str(self.lista_frame)):
+            return
+        if evento.num == 4 or getattr(evento, "delta", 0) > 0:
+            self.rolar("scroll", -1)
+        else:
+            self.rolar("scroll", 1)
+
+    def mostrar_gesto(self, chave):
+        """Rola o mínimo para o gesto ficar visível."""
+        indice = self.ordem_gestos.index(chave)
+        visiveis = self.linhas_visiveis()
+        if indice < self.primeira_linha:
+            self.primeira_linha = indice
+        elif indice >= self.primeira_linha + visiveis:
+            self.primeira_linha = indice - visiveis + 1
+        self.desenhar_lista()
 
     def refresh_ui_slots(self):
+        """Relê os gestos do perfil (mudou a lista ou um arquivo) e redesenha só o que mudou."""
+        self.chaves_config = self.chaves_perfil()
+        self.ordem_gestos = list(self.chaves_config)
+        gestos = self.get_dados_perfil_ativo().get("gestures", {})
+        self.lbl_total.configure(text=f"{len(gestos)} sons / {len(self.ordem_gestos)} gestos")
+        self.desenhar_lista()
+
+    def desenhar_lista(self):
+        """Liga cada linha do pool ao gesto que ela mostra agora e atualiza os widgets que mudaram."""
+        total = len(self.ordem_gestos)
+        visiveis = self.linhas_visiveis()
+        self.primeira_linha = max(0, min(self.primeira_linha, total - visiveis))
+        self.linha_da_chave = {}
+        for indice, linha in enumerate(self.linhas):
+            posicao = self.primeira_linha + indice
+            if posicao >= total:
+                if linha["chave"] is not None or linha["card"].winfo_manager():
+                    linha["chave"] = None
+                    linha["card"].pack_forget()
+                continue
+            chave = self.ordem_gestos[posicao]
+            linha["chave"] = chave
+            self.linha_da_chave[chave] = indice
+            if not linha["card"].winfo_manager():
+                linha["card"].pack(pady=3, fill="x", anchor="n")
+            self.pintar_estado_slot(chave)
+
+        if total:
+            self.scrollbar.set(self.primeira_linha / total, min(1.0, (self.primeira_linha + visiveis) / total))
+
+    # --- ESTADO DE CARREGAMENTO DOS SLOTS ---
+
+    def notificar_estado_slot(self, numero_gesto, estado, memoria=None):
+        """Pode ser chamado de qualquer thread: a atualização acontece no loop do Tk."""
+        self.fila_notificacoes.put((numero_gesto, estado, memoria))
+
+    def processar_notificacoes(self):
+        while True:
+            try:
+                numero_gesto, estado, memoria = self.fila_notificacoes.get_nowait()
+            except queue.Empty:
+                break
+            self.estados_slots[numero_gesto] = estado
+            self.memoria_slots[numero_gesto] = memoria
+            self.pintar_estado_slot(numero_gesto)
+        self.root.after(100, self.processar_notificacoes)
+
+    def dados_linha(self, chave):
+        """O que a linha do gesto mostra, só com dados em memória (sem tocar no disco)."""
         dados = self.get_dados_perfil_ativo()
-        gestos = dados.get("gestures", {})
+        str_num = self.chave_config(chave)
+        path = dados.get("gestures", {}).get(str_num)
         aliases = dados.get("aliases", {})
-        
-        for i in range(1, 11):
-            str_num = str(i)
-            path = gestos.get(str_num, None)
-            
-            if i in self.labels_caminhos: 
-                if path and os.path.exists(path):
-                    if str_num in aliases:
-                        txt = aliases[str_num]
-                        cor = "#4CC9F0"
-                    else:
-                        txt = os.path.basename(path)
-                        cor = "white"
-                    self.labels_caminhos[i].configure(text=truncate_text(txt, 25), text_color=cor)
-                else:
-                    self.labels_caminhos[i].configure(text="Selecionar áudio...", text_color="gray")
+
+        # Até o backend avisar que o arquivo sumiu, ele é considerado presente
+        if path and self.estados_slots.get(chave) != "missing":
+            if str_num in aliases:
+                txt, cor_txt = aliases[str_num], "#4CC9F0"
+            else:
+                txt, cor_txt = os.path.basename(path), "white"
+            txt = truncate_text(txt, 25)
+        else:
+            txt, cor_txt = "Selecionar áudio...", "gray"
+
+        if not path:
+            cor = COR_SLOT_VAZIO
+        else:
+            cor = CORES_ESTADO_SLOT.get(self.estados_slots.get(chave), COR_SLOT_VAZIO)
+
+        # Memória do som na RAM ("stream" = só os blocos do streaming ficam na memória)
+        memoria = self.memoria_slots.get(chave) if cor != COR_SLOT_VAZIO else None
+        if memoria:
+            tamanho, stream = memoria
+            txt_memoria = f"{'stream ' if stream else ''}{tamanho / 1024 / 1024:.1f} MB"
+        else:
+            txt_memoria = ""
+
+        fonte_num = ("Arial", 12 if isinstance(chave, int) else 10, "bold")
+        return {"numero": {"text": str(chave), "font": fonte_num, "fg_color": cor},
+                "caminho": {"text": txt, "text_color": cor_txt},
+                "memoria": {"text": txt_memoria}}
+
+    def pintar_estado_slot(self, numero_gesto):
+        # Gestos fora da tela só guardam o estado (pintados quando a rolagem chegar neles)
+        if numero_gesto not in self.linha_da_chave:
+            return
+        linha = self.linhas[self.linha_da_chave[numero_gesto]]
+        # configure() só nos widgets cujas propriedades mudaram desde o último desenho
+        for nome, propriedades in self.dados_linha(numero_gesto).items():
+            if linha["aplicado"].get(nome) != propriedades:
+                linha[nome].configure(**propriedades)
+                linha["aplicado"][nome] = propriedades
 
     # --- MÉTODOS DE SLOT ---
 
     def renomear_som(self, numero_gesto):
         dados = self.get_dados_perfil_ativo()
-        str_num = str(numero_gesto)
+        str_num = self.chave_config(numero_gesto)
         
         if str_num not in dados["gestures"]: return
 
@@ -281,7 +508,7 @@ class SoundpadInterface:
 
     def limpar_slot(self, numero_gesto):
         dados = self.get_dados_perfil_ativo()
-        str_num = str(numero_gesto)
+        str_num = self.chave_config(numero_gesto)
         
         mudou = False
         if str_num in dados["gestures"]:
@@ -299,17 +526,20 @@ class SoundpadInterface:
         arquivo = filedialog.askopenfilename(filetypes=[("Audio Files", "*.mp3 *.wav *.ogg")])
         if arquivo:
             dados = self.get_dados_perfil_ativo()
-            dados["gestures"][str(numero_gesto)] = arquivo
+            str_num = self.chave_config(numero_gesto)
+            dados["gestures"][str_num] = arquivo
             
-            if str(numero_gesto) in dados["aliases"]:
-                del dados["aliases"][str(numero_gesto)]
+            if str_num in dados["aliases"]:
+                del dados["aliases"][str_num]
+            # O estado era do arquivo antigo (ex: "missing"); o novo chega com a recarga
+            self.estados_slots.pop(numero_gesto, None)
                 
             self.refresh_ui_slots()
             self.callback_atualizar_config()
             
     def ao_mudar_volume(self, valor):
         self.config["volume"] = float(valor) / 100.0
-        self.callback_atualizar_config()
+        self.callback_volume()
 
     def ao_clicar_start(self):
         self.rodando = not self.rodando
@@ -0,0 +1,75 @@
+import cv2
+import json
+import time
+import threading
+import collections
+import numpy as np
+
+# --- MÉTRICAS DE DESEMPENHO ---
+
+# Estágios do loop da câmera, na ordem em que acontecem
+ESTAGIOS = ("capture", "flip_convert", "inference", "gesture", "draw", "display")
+
+class Metricas:
+    """
+    Tempos de cada estágio do loop da câmera em janelas deslizantes
+    (os últimos `janela` frames), com p50/p95/p99 em milissegundos.
+
+    Se `arquivo` for definido, a cada `intervalo` segundos uma linha JSON
+    com o resumo é acrescentada nele (JSON-lines), para comparar câmeras e máquinas.
+    Pode ser alimentada de várias threads (captura, inferência, render).
+    """
+    def __init__(self, janela=300, arquivo=None, intervalo=5.0):
+        self.arquivo = arquivo
+        self.intervalo = intervalo
+        self._tempos = {estagio: collections.deque(maxlen=janela) for estagio in ESTAGIOS}
+        self._ultimo_export = time.time()
+        self._lock = threading.Lock()
+
+    def registrar(self, estagio, segundos):
+        self._tempos[estagio].append(segundos)
+
+    def percentis(self, estagio):
+        """Retorna (p50, p95, p99) em ms, ou None se o estágio ainda não rodou."""
+        amostras = list(self._tempos[estagio])
+        if not amostras:
+            return None
+        p50, p95, p99 = np.percentile(amostras, (50, 95, 99)) * 1000
+        return float(p50), float(p95), float(p99)
+
+    def resumo(self):
+        resumo = {}
+        for estagio in ESTAGIOS:
+            valores = self.percentis(estagio)
+            if valores:
+                resumo[estagio] = {"p50": round(valores[0], 2), "p95": round(valores[1], 2),
+                                   "p99": round(valores[2], 2), "n": len(self._tempos[estagio])}
+        return resumo
+
+    def exportar_se_preciso(self, extras=None, agora=None):
+        """Acrescenta uma linha no arquivo de métricas quando o intervalo vence."""
+        agora = time.time() if agora is None else agora
+        if not self.arquivo or agora - self._ultimo_export < self.intervalo:
+            return
+        self._ultimo_export = agora
+        linha = {"t": round(agora, 3), "stages_ms": self.resumo()}
+        if extras:
+            linha.update(extras)
+        with self._lock:
+            try:
+                with open(self.arquivo, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(linha) + "\n")
+            except OSError as e:
+                print(f"Erro ao salvar métricas: {e}")
+
+    def desenhar(self, img):
+        """HUD de desempenho (tecla 'p'): uma linha por estágio, abaixo da barra do topo."""
+        y = 75
+        for estagio in ESTAGIOS:
+            valores = self.percentis(estagio)
+            if valores is None:
+                continue
+            texto = f"{estagio:<12} p50 {valores[0]:5.1f}  p95 {valores[1]:5.1f}  p99 {valores[2]:5.1f} ms"
+            cv2.putText(img, texto, (20, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 0, 0), 3, cv2.LINE_AA)
+            cv2.putText(img, texto, (20, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (80, 255, 80), 1, cv2.LINE_AA)
+            y += 18
@@ -0,0 +1,320 @@
+import cv2
+import time
+import threading
+import collections
+
+from helpers import ler_maos, scores_maos, lados_maos
+
+# --- FILAS E MEDIDORES ---
+
+class FilaRecente:
+    """
+    Fila limitada que descarta o item mais antigo quando enche.
+    Assim quem consome sempre recebe o frame mais novo disponível.
+    """
+    def __init__(self, tamanho=1):
+        self._itens = collections.deque(maxlen=tamanho)
+        self._cond = threading.Condition()
+        self.descartados = 0
+
+    def colocar(self, item):
+        with self._cond:
+            if len(self._itens) == self._itens.maxlen:
+                self.descartados += 1
+            self._itens.append(item)
+            self._cond.notify_all()
+
+    def esperar_vaga(self, continuar):
+        """Bloqueia enquanto a fila está cheia (e continuar() for True): modo sem descarte."""
+        with self._cond:
+            while len(self._itens) == self._itens.maxlen and continuar():
+                self._cond.wait(0.1)
+
+    def pegar(self, timeout=None):
+        """Retorna o item mais antigo da fila ou None se estourar o timeout."""
+        with self._cond:
+            if not self._itens:
+                self._cond.wait(timeout)
+            if not self._itens:
+                return None
+            item = self._itens.popleft()
+            self._cond.notify_all() # Acorda quem espera vaga
+            return item
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class MedidorFPS:
+    """Conta eventos numa janela deslizante de tempo para calcular o FPS."""
+    def __init__(self, janela=1.0):
+        self.janela = janela
+        self._marcas = collections.deque()
+
+    def marcar(self, agora=None):
+        agora = time.time() if agora is None else agora
+        self._marcas.append(agora)
+        while self._marcas and agora - self._marcas[0] > self.janela:
+            self._marcas.popleft()
+
+    @property
+    def fps(self):
+        if len(self._marcas) < 2:
+            return 0.0
+        duracao = self._marcas[-1] - self._marcas[0]
+        return (len(self._marcas) - 1) / duracao if duracao > 0 else 0.0
+
+
+# --- AGENDADOR DE INFERÊNCIA ---
+
+class AgendadorInferencia:
+    """
+    Decide quanto da imagem (e com que frequência) vai para o MediaPipe.
+
+    - Ocioso (nenhuma mão): roda poucas vezes por segundo numa imagem reduzida.
+    - Ativo (mão visível): roda em todo frame, na imagem inteira. O recorte em
+      volta da mão fica por conta do próprio MediaPipe: no modo de rastreamento
+      ele já usa os landmarks do frame anterior como região e pula a detecção
+      da palma. Recortar aqui fora trocaria a imagem de um frame para o outro
+      e invalidaria esse rastreamento.
+
+    Os landmarks são normalizados (0 a 1), então a troca da imagem reduzida
+    para a inteira não perde a mão encontrada no modo ocioso.
+    """
+    def __init__(self, intervalo_ocioso=0.2, largura_ociosa=320, frames_para_ocioso=15):
+        self.intervalo_ocioso = intervalo_ocioso
+        self.largura_ociosa = largura_ociosa
+        self.frames_para_ocioso = frames_para_ocioso
+        self.ativo = False
+        self._ultima = float("-inf")
+        self._sem_mao = 0
+
+    def preparar(self, img, agora):
+        """Retorna a imagem para a IA, ou None se este frame deve pular a IA."""
+        if self.ativo:
+            return img
+
+        if agora - self._ultima < self.intervalo_ocioso:
+            return None
+        self._ultima = agora
+        h, w = img.shape[:2]
+        if w > self.largura_ociosa:
+            escala = self.largura_ociosa / w
+            img = cv2.resize(img, (self.largura_ociosa, int(h * escala)), interpolation=cv2.INTER_AREA)
+        return img
+
+    def atualizar(self, results):
+        """Ajusta o modo pelo resultado da IA."""
+        if results and results.multi_hand_landmarks:
+            self.ativo = True
+            self._sem_mao = 0
+        else:
+            self._sem_mao += 1
+            if self._sem_mao >= self.frames_para_ocioso:
+                self.ativo = False
+
+
+# --- PIPELINE DA CÂMERA ---
+
+class FonteCamera:
+    """
+    Uma câmera do pipeline: captura própria, fila própria e contadores próprios.
+    Cada fonte tem seu modelo (o rastreamento do MediaPipe depende da sequência
+    de frames da mesma câmera) e seu agendador (o modo ocioso/ativo é por vista).
+    """
+    def __init__(self, nome, cap, hands, agendador=None):
+        self.nome = nome
+        self.cap = cap
+        self.hands = hands
+        self.agendador = agendador
+        self.fila_frames = FilaRecente(1)
+        self.fps = {
+            "captura": MedidorFPS(),
+            "inferencia": MedidorFPS(),
+            "render": MedidorFPS(),
+        }
+        self.latencias = collections.deque(maxlen=60) # captura -> fim da inferência (s)
+        self.ativa = False
+        # Fontes de arquivo: relógio de mídia e, no ritmo "fast", nenhum frame descartado
+        self.relogio = getattr(cap, "tempo_frame", None)
+        self.sem_descarte = getattr(cap, "sem_descarte", False)
+        self.frames = 0
+
+    def latencia_media(self):
+        return sum(self.latencias) / len(self.latencias) if self.latencias else 0.0
+
+    def estatisticas(self):
+        """Números da fonte para exportar (FPS por estágio e latência captura -> inferência)."""
+        return {"fps": {nome: round(medidor.fps, 1) for nome, medidor in self.fps.items()},
+                "latency_ms": round(self.latencia_media() * 1000, 1),
+                "dropped": self.fila_frames.descartados}
+
+    def resumo(self):
+        partes = [f"{nome} {medidor.fps:.1f} fps" for nome, medidor in self.fps.items()]
+        if self.latencias:
+            partes.append(f"latency {self.latencia_media() * 1000:.0f} ms")
+        partes.append(f"dropped {self.fila_frames.descartados}")
+        return " | ".join(partes)
+
+
+class PipelineCamera:
+    """
+    Separa o loop da câmera em estágios independentes:
+    captura (uma thread por câmera) -> inferência (uma thread para todas)
+    -> render (quem chama proximo_resultado).
+
+    Cada estágio conversa com o próximo por uma FilaRecente de tamanho 1,
+    então um estágio lento nunca acumula frames velhos atrás de si.
+    Com várias câmeras, a thread de inferência atende as fontes em rodízio:
+    o custo de IA não cresce com o número de câmeras, cada uma recebe uma fatia.
+
+    Com um AgendadorInferencia, frames que pulam a IA seguem para o render
+    sem mãos (para o preview continuar fluido).
+
+    Se todas as fontes são sem descarte (arquivos no ritmo "fast"), as filas
+    esperam vaga em vez de descartar: todo frame passa por todos os estágios.
+    """
+    def __init__(self, fontes, metricas=None):
+        self.fontes = list(fontes)
+        self.metricas = metricas
+        self.fila_resultados = FilaRecente(1)
+        self.sem_descarte = all(fonte.sem_descarte for fonte in self.fontes)
+        self.ativo = False
+        self.esgotado = False # Todas as fontes acabaram e a inferência já processou tudo
+        self._novo_frame = threading.Event()
+        self._proxima = 0
+        self._threads = []
+
+    def iniciar(self):
+        self.ativo = True
+        self.esgotado = False
+        self._threads = []
+        for indice, fonte in enumerate(self.fontes):
+            fonte.ativa = True
+            self._threads.append(threading.Thread(target=self._loop_captura, args=(indice, fonte), daemon=True))
+        self._threads.append(threading.Thread(target=self._loop_inferencia, daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def parar(self):
+        self.ativo = False
+        for t in self._threads:
+            t.join(timeout=1.0)
+        self._threads = []
+
+    def _loop_captura(self, indice, fonte):
+        numero = 0
+        while self.ativo and fonte.cap.isOpened():
+            t0 = time.perf_counter()
+            success, img = fonte.cap.read()
+            if not success:
+                break
+            # Marca o instante em que o frame saiu da câmera ("vidro"); arquivos usam o tempo do vídeo
+            agora = time.time()
+            t_captura = fonte.relogio() if fonte.relogio else agora
+            self._medir("capture", t0)
+            fonte.fps["captura"].marcar(agora)
+            if fonte.sem_descarte:
+                fonte.fila_frames.esperar_vaga(lambda: self.ativo)
+            fonte.fila_frames.colocar({"img": img, "t_captura": t_captura, "t_leitura": agora,
+                                       "indice": numero, "fonte": indice})
+            fonte.frames += 1
+            self._novo_frame.set()
+            numero += 1
+        fonte.ativa = False
+        self._novo_frame.set()
+
+    def _proximo_frame(self):
+        """Próximo frame em rodízio entre as fontes, ou None se nenhuma tem frame novo."""
+        total = len(self.fontes)
+        for passo in range(total):
+            indice = (self._proxima + passo) % total
+            frame = self.fontes[indice].fila_frames.pegar(timeout=0)
+            if frame is not None:
+                self._proxima = (indice + 1) % total
+                return frame
+        return None
+
+    def _loop_inferencia(self):
+        while self.ativo:
+            # Limpa antes de olhar as filas: um frame que chegar depois acorda o wait
+            self._novo_frame.clear()
+            # Lido antes das filas: uma fonte que acabou já tinha colocado o último frame
+            capturando = any(f.ativa for f in self.fontes)
+            frame = self._proximo_frame()
+            if frame is None:
+                # O pipeline acaba quando nenhuma fonte entrega mais frames e as filas esvaziaram
+                if not capturando:
+                    self.esgotado = True
+                    return
+                self._novo_frame.wait(0.1)
+                continue
+            fonte = self.fontes[frame["fonte"]]
+
+            # Espelha a imagem (o preview também usa a versão espelhada)
+            t0 = time.perf_counter()
+            img = cv2.flip(frame["img"], 1)
+            frame["img"] = img
+
+            entrada = img
+            if fonte.agendador:
+                entrada = fonte.agendador.preparar(img, frame["t_captura"])
+
+            results = None
+            if entrada is None:
+                self._medir("flip_convert", t0)
+            else:
+                img_rgb = cv2.cvtColor(entrada, cv2.COLOR_BGR2RGB)
+                t1 = self._medir("flip_convert", t0)
+                results = fonte.hands.process(img_rgb)
+                self._medir("inference", t1)
+                if fonte.agendador:
+                    fonte.agendador.atualizar(results)
+                fonte.fps["inferencia"].marcar()
+
+            # O render recebe os dedos de cada mão em bits, o pulso, a confiança e o lado
+            # (frames que pularam a IA chegam sem mãos); o array completo dos landmarks
+            # só é montado se o render pedir (maos_do_frame: desenho e gravação)
+            landmarks = results.multi_hand_landmarks if results else None
+            frame["codigos"], frame["pulsos"] = ler_maos(landmarks)
+            frame["landmarks"] = landmarks
+            frame["scores"] = scores_maos(results)
+            frame["lados"] = lados_maos(results)
+
+            frame["t_inferencia"] = time.time()
+            fonte.latencias.append(frame["t_inferencia"] - frame["t_leitura"])
+            if self.sem_descarte:
+                self.fila_resultados.esperar_vaga(lambda: self.ativo)
+            self.fila_resultados.colocar(frame)
+
+    def _medir(self, estagio, inicio):
+        """Registra o tempo do estágio (se houver Metricas) e devolve o instante atual."""
+        agora = time.perf_counter()
+        if self.metricas:
+            self.metricas.registrar(estagio, agora - inicio)
+        return agora
+
+    def terminou(self):
+        """True se o pipeline foi parado ou se as fontes acabaram e o render já pegou tudo."""
+        return not self.ativo or (self.esgotado and not len(self.fila_resultados))
+
+    def proximo_resultado(self, timeout=0.1):
+        """Entrega o resultado de inferência mais recente para o estágio de render."""
+        frame = self.fila_resultados.pegar(timeout)
+        if frame is not None:
+            self.fontes[frame["fonte"]].fps["render"].marcar()
+        return frame
+
+    def estatisticas(self):
+        return {fonte.nome: fonte.estatisticas() for fonte in self.fontes}
+
+    def resumo(self, idade_frame=None):
+        """Texto curto com o FPS de cada estágio por câmera (e a idade do último frame)."""
+        if len(self.fontes) == 1:
+            partes = [self.fontes[0].resumo()]
+        else:
+            partes = [f"[{fonte.nome}] {fonte.resumo()}" for fonte in self.fontes]
+        if idade_frame is not None:
+            partes.append(f"frame age {idade_frame * 1000:.0f} ms")
+        partes.append(f"render dropped {self.fila_resultados.descartados}")
+        return " | ".join(partes)
@@ -0,0 +1,306 @@
+"""
+Captura + MediaPipe num processo separado ("inference_mode": "process" no config.json).
+
+O processo principal (Tk, pygame, render) não disputa o GIL com a IA:
+- os frames voltam por um anel de memória compartilhada (sem copiar pelo pipe);
+- pelo pipe só passam comandos e os landmarks já em array (alguns KB por frame).
+O processo é criado uma vez e reaproveitado a cada START CAMERA.
+"""
+import time
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+
+# --- ANEL DE FRAMES EM MEMÓRIA COMPARTILHADA ---
+
+class AnelFrames:
+    """
+    `slots` frames numa SharedMemory. Cada slot tem um cabeçalho int64 com o
+    número de sequência do frame e, depois, os bytes da imagem.
+    Quem escreve marca -1 enquanto copia; quem lê confere a sequência antes e
+    depois da cópia (seqlock) e descarta o frame se ele foi sobrescrito no meio.
+    """
+    CABECALHO = 8
+
+    def __init__(self, slots, bytes_slot, nome=None):
+        self.slots = slots
+        self.bytes_slot = bytes_slot
+        self._passo = self.CABECALHO + bytes_slot
+        if nome is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self._passo)
+            self.dono = True
+        else:
+            # O processo filho (spawn) usa o mesmo resource_tracker do pai: só o dono apaga
+            self.shm = shared_memory.SharedMemory(name=nome)
+            self.dono = False
+        self._seq = [np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=i * self._passo)
+                     for i in range(slots)]
+        for seq in self._seq:
+            seq[0] = -1
+
+    @property
+    def nome(self):
+        return self.shm.name
+
+    def _imagem(self, slot, forma):
+        return np.ndarray(forma, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self._passo + self.CABECALHO)
+
+    def escrever(self, seq, img):
+        slot = seq % self.slots
+        self._seq[slot][0] = -1
+        self._imagem(slot, img.shape)[...] = img
+        self._seq[slot][0] = seq
+
+    def ler(self, seq, forma):
+        """Cópia do frame `seq`, ou None se o slot já foi reaproveitado."""
+        slot = seq % self.slots
+        if self._seq[slot][0] != seq:
+            return None
+        img = self._imagem(slot, forma).copy()
+        if self._seq[slot][0] != seq:
+            return None
+        return img
+
+    def fechar(self):
+        self._seq = [] # As views precisam sumir antes do close()
+        self.shm.close()
+        if self.dono:
+            self.shm.unlink()
+
+# --- PROCESSO DE INFERÊNCIA ---
+
+class _TemposEstagios:
+    """Fica no lugar do Metricas dentro do processo: junta os tempos para mandar com cada frame."""
+    def __init__(self):
+        self._tempos = []
+
+    def registrar(self, estagio, segundos):
+        self._tempos.append((estagio, segundos))
+
+    def esvaziar(self):
+        tempos, self._tempos = self._tempos, []
+        return tempos
+
+def _trabalhador(conexao, parametros_modelo):
+    import cv2
+    import mediapipe as mp
+    from camera import abrir_camera
+    from pipeline import PipelineCamera, FonteCamera, AgendadorInferencia
+
+    modelos = [] # Um por câmera, criados uma vez e reaproveitados entre sessões
+
+    def modelo(indice):
+        while len(modelos) <= indice:
+            novo = mp.solutions.hands.Hands(**parametros_modelo)
+            novo.process(np.zeros((240, 320, 3), dtype=np.uint8))
+            modelos.append(novo)
+        return modelos[indice]
+
+    modelo(0)
+    conexao.send(("pronto",))
+
+    try:
+        while True:
+            comando = conexao.recv()
+            if comando[0] == "sair":
+                return
+            if comando[0] != "iniciar":
+                continue
+            _, configs, adaptativo, nome_anel, slots, bytes_slot = comando
+
+            fontes = []
+            for indice, config in enumerate(configs):
+                hands = modelo(indice)
+                if hasattr(hands, "reset"):
+                    hands.reset()
+                fontes.append(FonteCamera(config["name"], abrir_camera(config), hands,
+                                          AgendadorInferencia() if adaptativo else None))
+            anel = AnelFrames(slots, bytes_slot, nome_anel)
+            tempos = _TemposEstagios()
+            pipeline = PipelineCamera(fontes, tempos)
+            pipeline.iniciar()
+            conexao.send(("iniciado", pipeline.sem_descarte))
+            try:
+                _sessao(conexao, pipeline, anel, tempos, cv2)
+            finally:
+                pipeline.parar()
+                for fonte in fontes:
+                    fonte.cap.release()
+                anel.fechar()
+            conexao.send(("parado",))
+    except (EOFError, BrokenPipeError, ConnectionResetError):
+        # O processo principal morreu: sai junto
+        return
+
+def _sessao(conexao, pipeline, anel, tempos, cv2):
+    from helpers import maos_do_frame
+    seq = 0
+    em_voo = 0 # Frames enviados e ainda não lidos (só conta no modo sem descarte)
+    fim_avisado = False
+    ultimo_stats = 0.0
+    while True:
+        while conexao.poll():
+            mensagem = conexao.recv()
+            if mensagem[0] == "parar":
+                return
+            if mensagem[0] == "lido":
+                em_voo -= 1
+
+        agora = time.time()
+        if agora - ultimo_stats >= 1.0:
+            conexao.send(("stats", {f.nome: f.estatisticas() for f in pipeline.fontes}, pipeline.resumo()))
+            ultimo_stats = agora
+
+        if pipeline.terminou():
+            if not fim_avisado:
+                conexao.send(("fim",))
+                fim_avisado = True
+            conexao.poll(0.1)
+            continue
+
+        # Sem descarte: nunca sobrescreve um slot que o principal ainda não leu
+        if pipeline.sem_descarte and em_voo >= anel.slots - 1:
+            conexao.poll(0.1)
+            continue
+
+        frame = pipeline.proximo_resultado(timeout=0.05)
+        if frame is None:
+            continue
+        img = frame["img"]
+        if img.nbytes > anel.bytes_slot:
+            escala = (anel.bytes_slot / img.nbytes) ** 0.5
+            img = cv2.resize(img, (int(img.shape[1] * escala), int(img.shape[0] * escala)))
+        anel.escrever(seq, img)
+        # Objetos do MediaPipe não passam pelo pipe: os landmarks vão como array (convertidos aqui, fora do principal)
+        conexao.send(("frame", seq, img.shape, frame["fonte"], frame["t_captura"], frame["t_leitura"], frame["t_inferencia"],
+                      maos_do_frame(frame), frame["codigos"], frame["pulsos"], frame["scores"], frame["lados"],
+                      tempos.esvaziar()))
+        seq += 1
+        if pipeline.sem_descarte:
+            em_voo += 1
+
+
+class InferenciaProcesso:
+    """
+    Lado do processo principal. Durante uma sessão tem a mesma interface do
+    PipelineCamera que o loop de render usa (proximo_resultado, terminou,
+    resumo, estatisticas, parar), só que os frames chegam de outro processo.
+    """
+    def __init__(self, parametros_modelo, slots=4):
+        self.slots = slots
+        contexto = multiprocessing.get_context("spawn")
+        self._conexao, conexao_filho = contexto.Pipe()
+        self.processo = contexto.Process(target=_trabalhador, args=(conexao_filho, parametros_modelo),
+                                         daemon=True, name="inferencia")
+        self.processo.start()
+        conexao_filho.close()
+        self._anel = None
+        self.metricas = None
+        self.sem_descarte = False
+        self.ativo = False
+        self._fim = False
+        self._estatisticas = {}
+        self._resumo = ""
+
+    def esperar_pronto(self):
+        """Bloqueia até o processo importar o MediaPipe e aquecer o modelo."""
+        mensagem = self._conexao.recv()
+        if mensagem[0] != "pronto":
+            raise RuntimeError(f"Unexpected message from inference process: {mensagem[0]}")
+
+    def iniciar(self, configs, adaptativo=True, metricas=None):
+        # O anel é do tamanho do maior frame pedido (frames maiores são reduzidos no processo)
+        bytes_slot = max(max(c.get("width") or 0, 1280) * max(c.get("height") or 0, 720) * 3 for c in configs)
+        self._anel = AnelFrames(self.slots, bytes_slot)
+        self.metricas = metricas
+        self._fim = False
+        try:
+            self._conexao.send(("iniciar", configs, adaptativo, self._anel.nome, self.slots, bytes_slot))
+            while True:
+                mensagem = self._conexao.recv()
+                if mensagem[0] == "iniciado":
+                    self.sem_descarte = mensagem[1]
+                    break
+        except (EOFError, OSError):
+            self._encerrar_sessao()
+            raise RuntimeError(f"Inference process is not running (exit code {self.processo.exitcode})")
+        self.ativo = True
+
+    def _encerrar_sessao(self):
+        """O processo morreu: fecha a sessão sem esperar resposta pelo pipe."""
+        self.ativo = False
+        if self._anel:
+            self._anel.fechar()
+            self._anel = None
+
+    def parar(self):
+        if not self.ativo:
+            return
+        self.ativo = False
+        self._conexao.send(("parar",))
+        # Descarta os frames que ainda estavam no pipe até a confirmação
+        limite = time.time() + 5.0
+        while time.time() < limite and self._conexao.poll(limite - time.time()):
+            if self._conexao.recv()[0] == "parado":
+                break
+        self._anel.fechar()
+        self._anel = None
+
+    def fechar(self):
+        """Encerra o processo (saída do app)."""
+        self.parar()
+        try:
+            self._conexao.send(("sair",))
+        except (BrokenPipeError, OSError):
+            pass
+        self.processo.join(timeout=2.0)
+
+    def terminou(self):
+        return not self.ativo or (self._fim and not self._conexao.poll())
+
+    def proximo_resultado(self, timeout=0.1):
+        """
+        Próximo frame vindo do processo. Com descarte, pula para o mais novo que
+        já chegou (como a FilaRecente); sem descarte, entrega todos em ordem.
+        """
+        if not self._conexao.poll(timeout):
+            return None
+        ultimo = None
+        while self._conexao.poll():
+            try:
+                mensagem = self._conexao.recv()
+            except EOFError:
+                print(f"[ERRO] Inference process exited (exit code {self.processo.exitcode})")
+                self._encerrar_sessao()
+                return None
+            if mensagem[0] == "frame":
+                ultimo = mensagem
+                if self.sem_descarte:
+                    break
+            elif mensagem[0] == "stats":
+                self._estatisticas, self._resumo = mensagem[1], mensagem[2]
+            elif mensagem[0] == "fim":
+                self._fim = True
+        if ultimo is None:
+            return None
+
+        _, seq, forma, fonte, t_captura, t_leitura, t_inferencia, maos, codigos, pulsos, scores, lados, tempos = ultimo
+        img = self._anel.ler(seq, forma)
+        if self.sem_descarte:
+            self._conexao.send(("lido",))
+        if img is None:
+            return None
+        if self.metricas:
+            for estagio, segundos in tempos:
+                self.metricas.registrar(estagio, segundos)
+        return {"img": img, "t_captura": t_captura, "t_leitura": t_leitura, "t_inferencia": t_inferencia,
+                "fonte": fonte, "maos": maos, "codigos": codigos, "pulsos": pulsos, "scores": scores, "lados": lados}
+
+    def estatisticas(self):
+        return self._estatisticas
+
+    def resumo(self, idade_frame=None):
+        partes = [self._resumo or "waiting for stats"]
+        if idade_frame is not None:
+            partes.append(f"frame age {idade_frame * 1000:.0f} ms")
+        return " | ".join(partes)
@@ -0,0 +1,194 @@
+"""
+Gravação e replay de landmarks do MediaPipe.
+
+Gravar (junto com a câmera):  python app.py --record sessao.npz
+Reproduzir offline:           python replay.py sessao.npz [--profile Nome] [--expected 2,L01100] [--repeat 10]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+from helpers import codigos_em_lote, indice_gesto
+from gestos import MaquinaGestos, TabelaGestos, PADRAO_GESTOS, chave_gesto
+
+# --- GRAVAÇÃO ---
+
+class GravadorLandmarks:
+    """
+    Acumula os landmarks de cada frame (com o instante de captura) e salva tudo
+    num .npz compacto:
+      t      (frames,)                 float64  instante de captura
+      qtd    (frames,)                 uint8    mãos detectadas no frame
+      maos   (frames, max_maos, 21, 3) float32  landmarks (NaN onde não há mão)
+      lados  (frames, max_maos)        uint8    0 esquerda, 1 direita (handedness)
+      scores (frames, max_maos)        float32  confiança do lado (NaN onde não há mão)
+    """
+    def __init__(self, max_maos=2):
+        self.max_maos = max_maos
+        self._tempos = []
+        self._maos = []
+        self._lados = []
+        self._scores = []
+
+    def adicionar(self, t, maos, lados=(), scores=()):
+        """
+        `maos` é o array (mãos, 21, 3) do landmarks_para_array (pode ter 0 mãos);
+        `lados` e `scores` são os do frame (lados_maos / scores_maos).
+        """
+        self._tempos.append(t)
+        self._maos.append(maos[:self.max_maos])
+        self._lados.append(lados[:self.max_maos])
+        self._scores.append(scores[:self.max_maos])
+
+    def __len__(self):
+        return len(self._tempos)
+
+    def salvar(self, caminho):
+        total = len(self._tempos)
+        maos = np.full((total, self.max_maos, 21, 3), np.nan, dtype=np.float32)
+        qtd = np.zeros(total, dtype=np.uint8)
+        lados = np.zeros((total, self.max_maos), dtype=np.uint8)
+        scores = np.full((total, self.max_maos), np.nan, dtype=np.float32)
+        for i, frame in enumerate(self._maos):
+            maos[i, :len(frame)] = frame
+            qtd[i] = len(frame)
+            lados[i, :len(self._lados[i])] = self._lados[i]
+            scores[i, :len(self._scores[i])] = self._scores[i]
+        np.savez_compressed(caminho, t=np.asarray(self._tempos, dtype=np.float64), qtd=qtd, maos=maos,
+                            lados=lados, scores=scores)
+        print(f"[RECORD] {total} frames saved to {caminho}")
+
+def carregar_gravacao(caminho):
+    """
+    Retorna (t, qtd, maos, lados, scores) de um arquivo salvo pelo GravadorLandmarks.
+    Gravações antigas não têm lados/scores: vêm como None.
+    """
+    with np.load(caminho) as dados:
+        lados = dados["lados"] if "lados" in dados else None
+        scores = dados["scores"] if "scores" in dados else None
+        return dados["t"], dados["qtd"], dados["maos"], lados, scores
+
+def perfil_replay(caminho_config, nome=None):
+    """
+    Lê do config.json o que o app usa para classificar e disparar no perfil
+    `nome` (padrão: o perfil atual). Retorna (tabela, disponíveis, parâmetros da
+    máquina), ou (TabelaGestos(), None, {}) se não houver config.
+    """
+    if not os.path.exists(caminho_config):
+        return TabelaGestos(), None, {}
+    with open(caminho_config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    nome = nome or config.get("current_profile", "Padrão")
+    perfil = config.get("profiles", {}).get(nome)
+    if perfil is None:
+        raise SystemExit(f"Profile '{nome}' not found in {caminho_config}")
+
+    # Como no app: toda chave entra na tabela; só as que têm som (ou param tudo) disparam
+    chaves, disponiveis = set(), set()
+    parar = perfil.get("stop_gesture", config.get("stop_gesture"))
+    for chave, caminho in [*perfil.get("gestures", {}).items(), (parar, True)]:
+        try:
+            gesto = chave_gesto(chave) if chave else None
+        except ValueError:
+            continue
+        if gesto is not None:
+            chaves.add(gesto)
+            if caminho:
+                disponiveis.add(gesto)
+    parametros = {chave: perfil.get(chave, config.get(chave, padrao)) for chave, padrao in PADRAO_GESTOS.items()}
+    return TabelaGestos(chaves), disponiveis, parametros
+
+# --- REPLAY ---
+
+def reproduzir(t, qtd, maos, lados=None, scores=None, parametros=None, tabela=None, disponiveis=None):
+    """
+    Passa a gravação pela mesma classificação e máquina de gestos do app, sem
+    esperar o tempo real: índice das mãos (indice_gesto) -> TabelaGestos do
+    perfil -> MaquinaGestos, só com os gestos `disponiveis` disparando.
+    Retorna a lista de disparos (instante, gesto, latência).
+    A latência vai do primeiro frame em que a leitura crua já era o gesto até o disparo.
+    """
+    maquina = MaquinaGestos(**(parametros or {}))
+    tabela = tabela or TabelaGestos()
+    leituras = []
+    disparos = []
+    # Dedos de todas as mãos da gravação num lote só (NaN vira código qualquer, ignorado por qtd)
+    codigos = codigos_em_lote(np.nan_to_num(maos)).tolist()
+    pulsos = maos[:, :, 0, :2].tolist()
+    lados = lados.tolist() if lados is not None else None
+    scores = scores.tolist() if scores is not None else None
+    for i in range(len(t)):
+        n = qtd[i]
+        indice = 0
+        if n:
+            # Sem lados (gravação antiga) a primeira mão vale como direita, como no indice_gesto
+            indice, _ = indice_gesto(codigos[i][:n], pulsos[i][:n], lados[i][:n] if lados else [],
+                                     scores[i][:n] if scores else None)
+        leitura = tabela[indice]
+        leituras.append(leitura)
+        if maquina.atualizar(leitura, t[i], disponiveis):
+            # Volta do início segundo a máquina até o começo da sequência crua do gesto
+            inicio = int(np.searchsorted(t, maquina.inicio))
+            while inicio > 0 and leituras[inicio - 1] == maquina.gesto:
+                inicio -= 1
+            disparos.append((t[i], maquina.gesto, t[i] - t[inicio]))
+    return disparos
+
+def percentil(valores, p):
+    return float(np.percentile(valores, p)) if len(valores) else float("nan")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay de landmarks gravados pela máquina de gestos")
+    parser.add_argument("arquivo", help="arquivo .npz gravado com app.py --record")
+    parser.add_argument("--expected", default="",
+                        help="gestos realmente feitos na sessão (ex: 2,3); outros disparos contam como falsos")
+    parser.add_argument("--repeat", type=int, default=1, help="repetições para medir o throughput")
+    parser.add_argument("--config", default="config.json",
+                        help="config.json de onde vêm as poses, os sons e os tempos do perfil")
+    parser.add_argument("--profile", help="perfil usado no replay (padrão: o perfil atual do config)")
+    # Sem valor na linha de comando, vale o do perfil (como no app)
+    parser.add_argument("--hold-time", type=float)
+    parser.add_argument("--vote-window", type=int)
+    parser.add_argument("--dropout-tolerance", type=float)
+    parser.add_argument("--cooldown", type=float)
+    args = parser.parse_args()
+
+    t, qtd, maos, lados, scores = carregar_gravacao(args.arquivo)
+    if len(t) == 0:
+        print("Empty recording.")
+        sys.exit(1)
+    if lados is None:
+        print("Old recording without handedness: the first hand counts as the right one.")
+
+    tabela, disponiveis, parametros = perfil_replay(args.config, args.profile)
+    for chave in PADRAO_GESTOS:
+        valor = getattr(args, chave)
+        parametros[chave] = valor if valor is not None else parametros.get(chave, PADRAO_GESTOS[chave])
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeat):
+        disparos = reproduzir(t, qtd, maos, lados, scores, parametros, tabela, disponiveis)
+    duracao = time.perf_counter() - inicio
+
+    frames = len(t) * args.repeat
+    duracao_sessao = t[-1] - t[0]
+    print(f"Recording: {len(t)} frames, {duracao_sessao:.1f} s "
+          f"({len(t) / duracao_sessao if duracao_sessao > 0 else 0:.1f} fps captured)")
+    print(f"Replay: {frames / duracao:.0f} frames/s "
+          f"({duracao_sessao * args.repeat / duracao:.0f}x real time)")
+
+    latencias = np.array([d[2] for d in disparos]) * 1000
+    print(f"Triggers: {len(disparos)}")
+    for instante, gesto, latencia in disparos:
+        print(f"  t={instante - t[0]:7.2f}s gesture {gesto} ({latencia * 1000:.0f} ms)")
+    if len(latencias):
+        print(f"Trigger latency ms: p50 {percentil(latencias, 50):.0f} | p95 {percentil(latencias, 95):.0f} "
+              f"| max {latencias.max():.0f} (hold time {parametros['hold_time'] * 1000:.0f})")
+
+    if args.expected:
+        esperados = {chave_gesto(g) for g in args.expected.split(",") if g.strip()}
+        falsos = [d for d in disparos if d[1] not in esperados]
+        print(f"False triggers: {len(falsos)}")
@@ -0,0 +1,62 @@
+"""
+Vigia de arquivos por polling: confere tamanho e data de modificação de cada
+caminho numa thread própria. Sem dependências e igual em Windows e Linux;
+para algumas centenas de sons, um os.stat por arquivo a cada segundo é nada.
+"""
+import os
+import threading
+
+DESCONHECIDO = object() # Estado "antes" de um caminho na primeira vez que ele é conferido
+
+def assinatura(caminho):
+    """(tamanho, mtime_ns) do arquivo, ou None se ele não existe."""
+    try:
+        info = os.stat(caminho)
+    except (OSError, ValueError):
+        return None
+    return (info.st_size, info.st_mtime_ns)
+
+class VigiaArquivos:
+    """
+    Chama ao_mudar(caminho, antes, depois) na thread do vigia quando um arquivo
+    observado aparece, some ou muda (antes/depois são assinaturas; None = não
+    existe). Na primeira conferência de cada caminho, antes é DESCONHECIDO.
+    """
+    def __init__(self, ao_mudar, intervalo=1.0):
+        self.ao_mudar = ao_mudar
+        self.intervalo = intervalo
+        self._estados = {}
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def observar(self, caminhos):
+        """Troca o conjunto de caminhos observados; os novos são conferidos logo."""
+        caminhos = set(caminhos)
+        with self._lock:
+            novos = caminhos - self._estados.keys()
+            self._estados = {c: self._estados.get(c, DESCONHECIDO) for c in caminhos}
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="vigia")
+            self._thread.start()
+        elif novos:
+            self._acordar.set()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                caminhos = list(self._estados)
+            for caminho in caminhos:
+                depois = assinatura(caminho)
+                with self._lock:
+                    if caminho not in self._estados:
+                        continue # Deixou de ser observado durante a volta
+                    antes = self._estados[caminho]
+                    self._estados[caminho] = depois
+                if antes != depois:
+                    try:
+                        self.ao_mudar(caminho, antes, depois)
+                    except Exception as e:
+                        print(f"[ERRO] File watcher callback failed for {caminho}: {e}")
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()